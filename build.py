@@ -0,0 +1,186 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import requests
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from distritos import carregar_referencias, enriquecer
+from indice_pesquisa import construir_indice
+from resumo import CAMPOS_RESUMO, N_BALDES_DETALHES, construir_detalhes, construir_resumo
+from versoes import json_canonico, publicar_versao
+from vizinhos import exportar_vizinhos
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PASTA_DADOS = "dados"
+
+def escrever_com_hash(pasta, nome, conteudo):
+    """
+    Escreve o conteúdo em <nome>.<hash>.json e remove as versões antigas do mesmo ficheiro
+    """
+    dados = conteudo.encode("utf-8")
+    nome_ficheiro = f"{nome}.{hashlib.sha256(dados).hexdigest()[:12]}.json"
+    caminho = os.path.join(pasta, nome_ficheiro)
+
+    for antigo in glob.glob(os.path.join(pasta, f"{nome}.*.json")):
+        if os.path.basename(antigo) != nome_ficheiro:
+            os.remove(antigo)
+
+    if not os.path.exists(caminho):
+        with open(caminho, "wb") as f:
+            f.write(dados)
+    return nome_ficheiro
+
+def pre_comprimir(caminho):
+    """
+    Gera as cópias .gz e .br (se o módulo brotli estiver instalado) de um ficheiro
+    """
+    with open(caminho, "rb") as f:
+        dados = f.read()
+
+    # mtime=0 para que o .gz seja igual entre builds com o mesmo conteúdo
+    with open(caminho + ".gz", "wb") as f:
+        f.write(gzip.compress(dados, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(caminho + ".br", "wb") as f:
+            f.write(brotli.compress(dados, quality=11))
+
+    return len(dados)
+
+def limpar_comprimidos(pasta):
+    """
+    Remove cópias .gz/.br cujo ficheiro original já não existe
+    """
+    for comprimido in glob.glob(os.path.join(pasta, "**", "*.json.gz"), recursive=True) + \
+            glob.glob(os.path.join(pasta, "**", "*.json.br"), recursive=True):
+        if not os.path.exists(comprimido[:-3]):
+            os.remove(comprimido)
+
+def escrever_detalhes(pasta, baldes):
+    """
+    Escreve um ficheiro com hash por balde de detalhes e remove baldes que já não existem
+    """
+    os.makedirs(pasta, exist_ok=True)
+    nomes = [escrever_com_hash(pasta, f"detalhes-{i:02d}", json_canonico(balde)) for i, balde in enumerate(baldes)]
+    for antigo in glob.glob(os.path.join(pasta, "detalhes-*.json")):
+        if os.path.basename(antigo) not in nomes:
+            os.remove(antigo)
+    return [f"{os.path.basename(pasta)}/{nome}" for nome in nomes]
+
+def restaurar_versoes(url_dados, pasta_versoes):
+    """
+    Descarrega do site publicado o manifesto de versões, o snapshot atual e os
+    deltas, para que o novo build continue o histórico (dados/ não está no git)
+    """
+    url_versoes = url_dados.rstrip("/") + "/versoes/"
+    try:
+        r = requests.get(url_versoes + "manifest.json", timeout=30)
+        r.raise_for_status()
+        manifesto = r.json()
+
+        os.makedirs(pasta_versoes, exist_ok=True)
+        nomes = [manifesto["snapshot"]] + [v["delta"] for v in manifesto["versoes"] if v.get("delta")]
+        for nome in nomes:
+            r = requests.get(url_versoes + nome, timeout=30)
+            r.raise_for_status()
+            with open(os.path.join(pasta_versoes, nome), "wb") as f:
+                f.write(r.content)
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        logger.warning(f"⚠️ Não foi possível restaurar as versões publicadas ({e}); o histórico recomeça neste build")
+        return False
+
+    # O manifesto é escrito por último: sem ele publicar_versao começa do zero
+    with open(os.path.join(pasta_versoes, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    logger.info(f"📥 {len(manifesto['versoes'])} versões restauradas de {url_versoes}")
+    return True
+
+def construir(dados_clubes, pasta=PASTA_DADOS, n_baldes=N_BALDES_DETALHES, comprimir=False):
+    """
+    Gera os ficheiros publicados pelo site a partir dos dados canónicos
+    """
+    os.makedirs(pasta, exist_ok=True)
+    pasta_versoes = os.path.join(pasta, "versoes")
+
+    # O snapshot da versão já é o clubes.json minificado com hash do conteúdo no nome
+    versoes = publicar_versao(dados_clubes, pasta_versoes)
+    # O site só descarrega o resumo; os detalhes de cada clube são pedidos ao abrir o popup
+    ficheiros = {
+        "clubes": f"versoes/{versoes['snapshot']}",
+        "resumo": escrever_com_hash(pasta, "resumo", json_canonico(construir_resumo(dados_clubes))),
+        "detalhes": escrever_detalhes(os.path.join(pasta, "detalhes"), construir_detalhes(dados_clubes, n_baldes)),
+        "indice_pesquisa": escrever_com_hash(pasta, "indice_pesquisa",
+                                             json_canonico(construir_indice(dados_clubes, versao_dados=versoes["atual"]))),
+        "vizinhos": escrever_com_hash(pasta, "vizinhos", json_canonico(exportar_vizinhos(dados_clubes))),
+    }
+
+    # As cópias .gz/.br só servem em servidores que as entregam diretamente
+    # (ex: nginx com gzip_static/brotli_static); o GitHub Pages comprime sozinho
+    limpar_comprimidos(pasta)
+    publicados = [os.path.join(pasta, f) for f in ficheiros.values() if isinstance(f, str)]
+    publicados += [os.path.join(pasta_versoes, v["delta"]) for v in versoes["versoes"] if v.get("delta")]
+    for caminho in publicados:
+        tamanho = pre_comprimir(caminho) if comprimir else os.path.getsize(caminho)
+        gzip_info = f" (gzip {os.path.getsize(caminho + '.gz')})" if comprimir else ""
+        logger.info(f"📦 {os.path.relpath(caminho, pasta)}: {tamanho} bytes{gzip_info}")
+    tamanhos = [pre_comprimir(os.path.join(pasta, f)) if comprimir else os.path.getsize(os.path.join(pasta, f))
+                for f in ficheiros["detalhes"]]
+    logger.info(f"📦 detalhes/: {len(tamanhos)} ficheiros, {sum(tamanhos)} bytes ({min(tamanhos)}-{max(tamanhos)} cada)")
+    if comprimir and brotli is None:
+        logger.warning("⚠️ Módulo brotli não instalado - cópias .br não foram geradas")
+
+    manifesto = {
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "versao": versoes["atual"],
+        "ficheiros": ficheiros,
+        "campos_resumo": list(CAMPOS_RESUMO),
+        "deltas": [
+            {"hash": v["hash"], "anterior": v["anterior"], "ficheiro": f"versoes/{v['delta']}"}
+            for v in versoes["versoes"] if v.get("delta")
+        ],
+    }
+    with open(os.path.join(pasta, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"✅ Build concluído em {pasta}/ (versão {versoes['atual'][:12]})")
+    return manifesto
+
+def main():
+    """Gera os dados minificados e com hash para o site"""
+    parser = argparse.ArgumentParser(description="Gera os ficheiros de dados publicados pelo mapa")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("--pasta", default=PASTA_DADOS, help="pasta de saída")
+    parser.add_argument("--restaurar-de", metavar="URL",
+                        help="URL da pasta dados/ publicada, para continuar o histórico de versões")
+    parser.add_argument("--comprimir", action="store_true",
+                        help="gera também cópias .gz/.br (para servidores que as servem diretamente)")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    # Preenche só o distrito/concelho em falta; os valores do clubes.json (ex: corrigidos à mão) ficam
+    referencias = carregar_referencias()
+    if referencias:
+        relatorio = enriquecer(dados_clubes, **referencias)
+        logger.info(f"🗺️ {relatorio['com_distrito']}/{relatorio['total_clubes']} clubes com distrito "
+                    f"({len(relatorio['valor_existente_divergente'])} valores do clubes.json diferentes do calculado)")
+
+    if args.restaurar_de:
+        restaurar_versoes(args.restaurar_de, os.path.join(args.pasta, "versoes"))
+    construir(dados_clubes, args.pasta, comprimir=args.comprimir)
+
+if __name__ == "__main__":
+    main()
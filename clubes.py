@@ -1,4 +1,3 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import time
@@ -7,51 +6,13 @@ import re
 import sys
 import hashlib
 
+from competicoes import COMPETICOES
+# Mesmo cliente HTTP do scraper (Retry-After limitado a MAX_RETRY_AFTER, backoff exponencial)
+from scraper import fazer_requisicao
+
 # Configurações
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-TIMEOUT = 15
 DELAY = 3
 
-# URLs base para competições portuguesas e principais europeias
-COMPETICOES = [
-        "https://www.zerozero.pt/edicao/af-algarve-1-divisao-1-fase-2025-26/203185" ,
-        "https://www.zerozero.pt/competicao/af-aveiro-campeonato-de-elite",
-        "https://www.zerozero.pt/competicao/af-beja-i-divisao",
-        "https://www.zerozero.pt/competicao/af-braga-pro-nacional",
-        "https://www.zerozero.pt/competicao/af-braganca-divisao-honra",
-        "https://www.zerozero.pt/competicao/af-castelo-branco-i-divisao",
-        "https://www.zerozero.pt/competicao/af-evora-divisao-elite-pro-nacional",
-        "https://www.zerozero.pt/competicao/af-coimbra-divisao-elite",
-        "https://www.zerozero.pt/competicao/af-guarda-1-divisao",
-        "https://www.zerozero.pt/competicao/af-leiria-divisao-honra",
-        "https://www.zerozero.pt/competicao/af-madeira-divisao-de-honra",
-        "https://www.zerozero.pt/competicao/af-portalegre-taca-honra",
-        "https://www.zerozero.pt/competicao/af-porto-divisao-liga-pro-2383",
-        "https://www.zerozero.pt/competicao/af-santarem-1-divisao",
-        "https://www.zerozero.pt/competicao/af-setubal-i-divisao",
-        "https://www.zerozero.pt/competicao/af-viana-do-castelo-1-divisao",
-        "https://www.zerozero.pt/competicao/af-vila-real-divisao-de-honra",
-        "https://www.zerozero.pt/competicao/af-viseu-divisao-honra"
-]
-
-def fazer_requisicao(url, max_tentativas=3):
-    """Faz uma requisição HTTP com tratamento de erros melhorado e retry automático"""
-    for tentativa in range(max_tentativas):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            if tentativa == max_tentativas - 1:
-                print(f"✗ Erro final ao aceder {url}: {str(e)}")
-                return None
-            else:
-                print(f"⚠ Tentativa {tentativa + 1} falhou para {url}, tentando novamente...")
-                time.sleep(DELAY)
-    return None
-
 def extrair_id_clube(url):
     """Extrai o ID do clube da URL para garantir unicidade"""
     match = re.search(r'/(\d+)/?$', url)
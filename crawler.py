@@ -0,0 +1,334 @@
+import argparse
+import csv
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup
+
+import scraper
+from competicoes import COMPETICOES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ARQUIVO_FRONTEIRA = "crawler.sqlite"
+ARQUIVO_CSV = "clubes_zerozero.csv"
+
+# Tipos de página seguidos, por prioridade (menor = primeiro): as edições têm a
+# lista de equipas da época; competições e associações levam a novas edições
+PRIORIDADE_TIPO = {"edicao": 0, "competicao": 1, "associacao": 2}
+PADROES_TIPO = (
+    ("equipa", re.compile(r"^/equipa/[^/]+")),
+    ("equipa", re.compile(r"/team\.php$")),
+    ("edicao", re.compile(r"^/edicao/[^/]+")),
+    ("competicao", re.compile(r"^/competicao/[^/]+")),
+    ("associacao", re.compile(r"^/associacao/[^/]+")),
+)
+# Parâmetros de query que identificam a página; os restantes são descartados
+PARAMETROS_RELEVANTES = {"id", "epoca_id", "fase_id"}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS paginas (
+    hash INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    prioridade INTEGER NOT NULL,
+    profundidade INTEGER NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    descoberta_em REAL NOT NULL,
+    visitada_em REAL
+);
+CREATE INDEX IF NOT EXISTS idx_paginas_estado ON paginas (estado, prioridade);
+CREATE TABLE IF NOT EXISTS clubes (
+    id TEXT PRIMARY KEY,
+    nome TEXT,
+    url TEXT NOT NULL,
+    origem TEXT,
+    descoberto_em REAL NOT NULL
+);
+"""
+
+def normalizar_url(href, base):
+    """
+    URL absoluta e canónica (sem fragmento nem parâmetros irrelevantes), ou None
+    se não for uma página http(s)
+    """
+    partes = urlparse(urljoin(base, href.strip()))
+    if partes.scheme not in ("http", "https"):
+        return None
+    caminho = re.sub(r"/{2,}", "/", partes.path) or "/"
+    if caminho != "/":
+        caminho = caminho.rstrip("/")
+    # /equipa/nome/ID?epoca_id=... é o mesmo clube em qualquer época
+    if re.match(r"^/equipa/[^/]+/\d+$", caminho):
+        query = ""
+    else:
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(partes.query) if k in PARAMETROS_RELEVANTES))
+    return urlunparse((partes.scheme, partes.netloc.lower(), caminho, "", query, ""))
+
+def classificar(url):
+    """
+    Tipo da página (equipa, edicao, competicao, associacao) ou None
+    """
+    caminho = urlparse(url).path
+    for tipo, padrao in PADROES_TIPO:
+        if padrao.search(caminho):
+            return tipo
+    return None
+
+def hash_url(url):
+    """
+    Hash de 64 bits do URL: é a chave da tabela e o que fica em memória no
+    conjunto de páginas vistas (8 bytes em vez do URL inteiro)
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+class Crawler:
+    """
+    Crawler de competições do zerozero.pt com fronteira persistente em SQLite.
+
+    Parte das sementes e segue ligações de associações, competições e edições,
+    registando as equipas encontradas. As páginas já conhecidas nunca voltam a
+    entrar na fronteira; só são revisitadas quando ficam desatualizadas.
+    """
+
+    def __init__(self, caminho=ARQUIVO_FRONTEIRA, max_profundidade=3, delay=3.0,
+                 revisitar_dias=7, max_tentativas=3, padrao=None):
+        self.max_profundidade = max_profundidade
+        self.delay = delay
+        self.revisitar_segundos = revisitar_dias * 86400
+        self.max_tentativas = max_tentativas
+        self.padrao = re.compile(padrao) if padrao else None
+        self.conn = sqlite3.connect(caminho)
+        self.conn.executescript(ESQUEMA)
+        self.vistas = {h for (h,) in self.conn.execute("SELECT hash FROM paginas")}
+        self.hosts = {urlparse(url).netloc for (url,) in self.conn.execute(
+            "SELECT url FROM paginas WHERE profundidade = 0")}
+        self.ultimo_pedido = {}
+        self.robots = {}
+
+    def fechar(self):
+        self.conn.close()
+
+    def adicionar_sementes(self, urls):
+        """
+        Adiciona as páginas iniciais (profundidade 0) à fronteira
+        """
+        agora = time.time()
+        for url in urls:
+            url = normalizar_url(url, scraper.BASE_URL)
+            if url:
+                self.hosts.add(urlparse(url).netloc)
+                self._adicionar(url, classificar(url) or "competicao", 0, agora)
+        self.conn.commit()
+
+    def _adicionar(self, url, tipo, profundidade, agora):
+        h = hash_url(url)
+        if h in self.vistas:
+            return False
+        self.vistas.add(h)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO paginas (hash, url, tipo, prioridade, profundidade, descoberta_em) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (h, url, tipo, PRIORIDADE_TIPO[tipo], profundidade, agora))
+        return True
+
+    def reabrir_desatualizadas(self):
+        """
+        Devolve à fronteira as páginas visitadas há mais de `revisitar_dias`
+        """
+        cursor = self.conn.execute(
+            "UPDATE paginas SET estado = 'pendente', tentativas = 0 "
+            "WHERE estado = 'visitada' AND visitada_em < ?",
+            (time.time() - self.revisitar_segundos,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def proxima(self):
+        """
+        Próxima página da fronteira: primeiro as nunca visitadas, depois as mais
+        desatualizadas; dentro de cada grupo por tipo e profundidade
+        """
+        return self.conn.execute(
+            "SELECT hash, url, tipo, profundidade FROM paginas WHERE estado = 'pendente' "
+            "ORDER BY visitada_em IS NOT NULL, tentativas, prioridade, COALESCE(visitada_em, 0), "
+            "profundidade, descoberta_em LIMIT 1").fetchone()
+
+    def _permitido(self, url):
+        """
+        Consulta o robots.txt do host (lido uma vez por execução)
+        """
+        partes = urlparse(url)
+        if partes.netloc not in self.robots:
+            robots = RobotFileParser()
+            try:
+                r = requests.get(f"{partes.scheme}://{partes.netloc}/robots.txt",
+                                 headers=scraper.HEADERS, timeout=scraper.TIMEOUT)
+                robots.parse(r.text.splitlines() if r.status_code == 200 else [])
+            except requests.exceptions.RequestException:
+                robots.parse([])
+            self.robots[partes.netloc] = robots
+        return self.robots[partes.netloc].can_fetch(scraper.HEADERS["User-Agent"], url)
+
+    def _aguardar_vez(self, host):
+        """
+        Garante o intervalo mínimo entre pedidos ao mesmo host (ou o Crawl-delay do robots.txt)
+        """
+        intervalo = max(self.delay, self.robots[host].crawl_delay(scraper.HEADERS["User-Agent"]) or 0)
+        espera = self.ultimo_pedido.get(host, 0) + intervalo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        self.ultimo_pedido[host] = time.monotonic()
+
+    def processar(self, pagina):
+        """
+        Descarrega uma página, regista as equipas e junta as novas ligações à fronteira
+        """
+        h, url, tipo, profundidade = pagina
+        agora = time.time()
+        if not self._permitido(url):
+            logger.info(f"🚫 Bloqueado pelo robots.txt: {url}")
+            self.conn.execute("UPDATE paginas SET estado = 'bloqueada', visitada_em = ? WHERE hash = ?", (agora, h))
+            self.conn.commit()
+            return 0, 0
+
+        self._aguardar_vez(urlparse(url).netloc)
+        r = scraper.fazer_requisicao(url)
+        if r is None:
+            self.conn.execute(
+                "UPDATE paginas SET tentativas = tentativas + 1, "
+                "estado = CASE WHEN tentativas + 1 >= ? THEN 'falhada' ELSE estado END WHERE hash = ?",
+                (self.max_tentativas, h))
+            self.conn.commit()
+            return 0, 0
+
+        soup = BeautifulSoup(r.text, 'html.parser')
+        novas = clubes = 0
+        for link in soup.find_all('a', href=True):
+            destino = normalizar_url(link['href'], r.url)
+            if not destino or urlparse(destino).netloc not in self.hosts:
+                continue
+            tipo_destino = classificar(destino)
+
+            if tipo_destino == "equipa":
+                clube_id = scraper.extrair_id_clube(destino)
+                if clube_id:
+                    nome = link.get_text(" ", strip=True) or link.get("title") or None
+                    # Só conta equipas novas: um upsert também contaria as já conhecidas
+                    antes = self.conn.total_changes
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO clubes (id, nome, url, origem, descoberto_em) VALUES (?, ?, ?, ?, ?)",
+                        (clube_id, nome, destino, url, agora))
+                    if self.conn.total_changes > antes:
+                        clubes += 1
+                    elif nome:
+                        self.conn.execute("UPDATE clubes SET nome = ? WHERE id = ? AND nome IS NULL", (nome, clube_id))
+            elif tipo_destino and profundidade < self.max_profundidade:
+                if self.padrao and not self.padrao.search(urlparse(destino).path):
+                    continue
+                novas += self._adicionar(destino, tipo_destino, profundidade + 1, agora)
+        soup.decompose()
+
+        self.conn.execute("UPDATE paginas SET estado = 'visitada', tentativas = 0, visitada_em = ? WHERE hash = ?",
+                          (agora, h))
+        self.conn.commit()
+        return novas, clubes
+
+    def executar(self, max_paginas=200):
+        """
+        Processa a fronteira até esvaziar ou até gastar o orçamento de páginas
+        """
+        reabertas = self.reabrir_desatualizadas()
+        if reabertas:
+            logger.info(f"🔄 {reabertas} páginas desatualizadas voltaram à fronteira")
+
+        visitadas = 0
+        while visitadas < max_paginas:
+            pagina = self.proxima()
+            if pagina is None:
+                logger.info("🏁 Fronteira vazia")
+                break
+            novas, clubes = self.processar(pagina)
+            visitadas += 1
+            logger.info(f"🕸️ [{visitadas}/{max_paginas}] {pagina[2]} {pagina[1]} "
+                        f"(prof. {pagina[3]}): {novas} páginas novas, {clubes} equipas novas")
+        else:
+            logger.info(f"⏸️ Orçamento de {max_paginas} páginas esgotado; a fronteira continua na próxima execução")
+        return visitadas
+
+    def clubes(self):
+        """
+        Equipas descobertas, como [(id, nome, url)]
+        """
+        return self.conn.execute("SELECT id, nome, url FROM clubes ORDER BY descoberto_em, id").fetchall()
+
+    def contagens(self):
+        contagens = dict(self.conn.execute("SELECT estado, COUNT(*) FROM paginas GROUP BY estado").fetchall())
+        contagens["clubes"] = self.conn.execute("SELECT COUNT(*) FROM clubes").fetchone()[0]
+        return contagens
+
+def exportar_csv(crawler, arquivo_csv=ARQUIVO_CSV):
+    """
+    Junta as equipas descobertas ao CSV de clubes (nome,url), sem duplicar IDs
+    """
+    linhas = scraper.carregar_clubes_csv(arquivo_csv)
+    ids_existentes = {scraper.extrair_id_clube(linha['url']) for linha in linhas}
+
+    novos = 0
+    for clube_id, nome, url in crawler.clubes():
+        if clube_id not in ids_existentes:
+            linhas.append({'nome': nome or clube_id, 'url': url})
+            ids_existentes.add(clube_id)
+            novos += 1
+
+    linhas.sort(key=lambda linha: linha['nome'])
+    with open(arquivo_csv, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=['nome', 'url'], lineterminator='\n')
+        escritor.writeheader()
+        escritor.writerows(linhas)
+    logger.info(f"📄 {novos} clubes novos adicionados a {arquivo_csv} ({len(linhas)} no total)")
+    return novos
+
+def main():
+    """Descoberta de clubes a partir das competições, com fronteira persistente"""
+    parser = argparse.ArgumentParser(description="Crawler de competições do zerozero.pt para descobrir clubes")
+    parser.add_argument("--fronteira", default=ARQUIVO_FRONTEIRA, help="ficheiro SQLite da fronteira")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_explorar = comandos.add_parser("explorar", help="percorre a fronteira e exporta as equipas para o CSV")
+    p_explorar.add_argument("--semente", action="append",
+                            help="URL inicial (repetível; por omissão as competições de competicoes.py)")
+    p_explorar.add_argument("--max-paginas", type=int, default=200, help="orçamento de páginas por execução")
+    p_explorar.add_argument("--max-profundidade", type=int, default=3)
+    p_explorar.add_argument("--delay", type=float, default=3.0, help="intervalo mínimo entre pedidos ao mesmo host (s)")
+    p_explorar.add_argument("--revisitar-dias", type=float, default=7,
+                            help="idade a partir da qual uma página visitada volta à fronteira")
+    p_explorar.add_argument("--padrao", help="só segue páginas cujo caminho contenha esta regex, ex: '/af-'")
+    p_explorar.add_argument("--csv", default=ARQUIVO_CSV)
+
+    comandos.add_parser("estado", help="mostra o nº de páginas por estado e de equipas descobertas")
+
+    args = parser.parse_args()
+    if args.comando == "explorar":
+        crawler = Crawler(args.fronteira, args.max_profundidade, args.delay, args.revisitar_dias, padrao=args.padrao)
+    else:
+        crawler = Crawler(args.fronteira)
+
+    try:
+        if args.comando == "explorar":
+            crawler.adicionar_sementes(args.semente or COMPETICOES)
+            crawler.executar(args.max_paginas)
+            exportar_csv(crawler, args.csv)
+        logger.info(f"📊 Estado do crawler: {crawler.contagens()}")
+    finally:
+        crawler.fechar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from indice_pesquisa import dobrar_texto
+from validar import carregar_colunas, verificar_caixas
+from vizinhos import IndiceEspacial
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LIMITES_DISTRITOS = "limites/distritos.geojson"
+LIMITES_CONCELHOS = "limites/concelhos.geojson"
+# Localidades portuguesas do GeoNames com o distrito; usadas quando não há polígonos
+LUGARES = "limites/lugares.csv"
+DISTANCIA_MAXIMA_LUGAR_M = 30000
+PROPRIEDADES_NOME = ("distrito", "Distrito", "DISTRITO", "concelho", "Concelho", "CONCELHO", "name", "NAME", "nome")
+
+# Associação de futebol (chave do filtro) -> distrito/região a que pertence
+DISTRITO_DA_AF = {
+    "afalgarve": "Faro",
+    "afaveiro": "Aveiro",
+    "afbeja": "Beja",
+    "afbraga": "Braga",
+    "afbraganca": "Bragança",
+    "afcastelobranco": "Castelo Branco",
+    "afcoimbra": "Coimbra",
+    "afevora": "Évora",
+    "afguarda": "Guarda",
+    "afleiria": "Leiria",
+    "aflisboa": "Lisboa",
+    "afmadeira": "Madeira",
+    "afportalegre": "Portalegre",
+    "afporto": "Porto",
+    "afsantarem": "Santarém",
+    "afsetubal": "Setúbal",
+    "afvianadocastelo": "Viana do Castelo",
+    "afvilareal": "Vila Real",
+    "afviseu": "Viseu",
+}
+
+def carregar_regioes(caminho, propriedade=None):
+    """
+    Carrega um GeoJSON de polígonos e devolve [(nome, arestas, caixa)], onde
+    arestas é um array (m, 4) com x1, y1, x2, y2 de todos os anéis da região
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    regioes = []
+    for feature in geojson.get("features", []):
+        propriedades = feature.get("properties") or {}
+        chaves = (propriedade,) if propriedade else PROPRIEDADES_NOME
+        nome = next((propriedades[c] for c in chaves if propriedades.get(c)), None)
+        geometria = feature.get("geometry") or {}
+
+        if geometria.get("type") == "Polygon":
+            poligonos = [geometria["coordinates"]]
+        elif geometria.get("type") == "MultiPolygon":
+            poligonos = geometria["coordinates"]
+        else:
+            continue
+        if not nome:
+            logger.warning(f"⚠️ Região sem nome em {caminho} (propriedades: {list(propriedades)})")
+            continue
+
+        arestas = []
+        for poligono in poligonos:
+            for anel in poligono:
+                pontos = np.asarray(anel, dtype=np.float64)[:, :2]
+                if len(pontos) < 3:
+                    continue
+                # Fecha o anel se o GeoJSON não repetir o primeiro ponto
+                if not np.array_equal(pontos[0], pontos[-1]):
+                    pontos = np.vstack((pontos, pontos[:1]))
+                arestas.append(np.hstack((pontos[:-1], pontos[1:])))
+        if not arestas:
+            continue
+
+        arestas = np.vstack(arestas)
+        caixa = (arestas[:, [0, 2]].min(), arestas[:, [1, 3]].min(),
+                 arestas[:, [0, 2]].max(), arestas[:, [1, 3]].max())
+        regioes.append((nome, arestas, caixa))
+
+    logger.info(f"🗺️ {len(regioes)} regiões carregadas de {caminho}")
+    return regioes
+
+def pontos_no_poligono(x, y, arestas, caixa):
+    """
+    Teste vetorizado de pontos em polígono (regra par-ímpar, com buracos e
+    multipolígonos). As arestas são divididas em faixas horizontais para que
+    cada ponto só seja comparado com as arestas da sua faixa.
+    """
+    dentro = np.zeros(len(x), dtype=bool)
+    x_min, y_min, x_max, y_max = caixa
+    candidatos = np.flatnonzero((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+    if candidatos.size == 0:
+        return dentro
+
+    ex1, ey1, ex2, ey2 = arestas.T
+    n_faixas = int(np.clip(len(arestas) // 8, 1, 4096))
+    altura = (y_max - y_min) / n_faixas or 1.0
+
+    def faixa(valores):
+        return np.clip(((valores - y_min) / altura).astype(np.int64), 0, n_faixas - 1)
+
+    # Cada aresta entra em todas as faixas que o seu intervalo de y atravessa
+    primeira, ultima = faixa(np.minimum(ey1, ey2)), faixa(np.maximum(ey1, ey2))
+    repeticoes = ultima - primeira + 1
+    aresta_da_entrada = np.repeat(np.arange(len(arestas)), repeticoes)
+    faixa_da_entrada = np.repeat(primeira, repeticoes) + \
+        (np.arange(repeticoes.sum()) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes))
+    ordem = np.argsort(faixa_da_entrada, kind="stable")
+    aresta_da_entrada, faixa_da_entrada = aresta_da_entrada[ordem], faixa_da_entrada[ordem]
+    limites_arestas = np.searchsorted(faixa_da_entrada, np.arange(n_faixas + 1))
+
+    faixa_ponto = faixa(y[candidatos])
+    ordem_pontos = np.argsort(faixa_ponto, kind="stable")
+    candidatos, faixa_ponto = candidatos[ordem_pontos], faixa_ponto[ordem_pontos]
+    limites_pontos = np.searchsorted(faixa_ponto, np.arange(n_faixas + 1))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for b in np.unique(faixa_ponto):
+            p = candidatos[limites_pontos[b]:limites_pontos[b + 1]]
+            e = aresta_da_entrada[limites_arestas[b]:limites_arestas[b + 1]]
+            if e.size == 0:
+                continue
+            px, py = x[p][:, None], y[p][:, None]
+            atravessa = (ey1[e] > py) != (ey2[e] > py)
+            x_intersecao = ex1[e] + (py - ey1[e]) * (ex2[e] - ex1[e]) / (ey2[e] - ey1[e])
+            cruzamentos = (atravessa & (px < x_intersecao)).sum(axis=1)
+            dentro[p] = cruzamentos % 2 == 1
+
+    return dentro
+
+def atribuir_regioes(latitude, longitude, regioes):
+    """
+    Índice da região que contém cada ponto (-1 se nenhuma contém)
+    """
+    atribuicao = np.full(len(latitude), -1, dtype=np.int64)
+    validos = ~(np.isnan(latitude) | np.isnan(longitude))
+    x, y = longitude[validos], latitude[validos]
+    indices_validos = np.flatnonzero(validos)
+
+    for i, (_, arestas, caixa) in enumerate(regioes):
+        livres = atribuicao[indices_validos] == -1
+        dentro = pontos_no_poligono(x, y, arestas, caixa) & livres
+        atribuicao[indices_validos[dentro]] = i
+    return atribuicao
+
+def carregar_lugares(caminho):
+    """
+    Carrega o CSV de localidades (latitude, longitude, lugar, distrito) num índice espacial
+    """
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        linhas = list(csv.DictReader(f))
+
+    indice = IndiceEspacial([linha["distrito"] for linha in linhas],
+                            [float(linha["latitude"]) for linha in linhas],
+                            [float(linha["longitude"]) for linha in linhas])
+    logger.info(f"📍 {len(indice)} localidades carregadas de {caminho}")
+    return indice
+
+def nomes_por_regioes(latitude, longitude, regioes):
+    """
+    Nome da região (polígono) que contém cada ponto, ou None
+    """
+    atribuicao = atribuir_regioes(latitude, longitude, regioes)
+    return [regioes[i][0] if i >= 0 else None for i in atribuicao]
+
+def nomes_por_lugares(latitude, longitude, lugares, distancia_maxima=DISTANCIA_MAXIMA_LUGAR_M):
+    """
+    Distrito da localidade mais próxima de cada ponto (None se estiver a mais de
+    distancia_maxima metros). Aproximado: perto das fronteiras entre distritos
+    a localidade mais próxima pode ser do distrito vizinho.
+    """
+    nomes = [None] * len(latitude)
+    validos = np.flatnonzero(~(np.isnan(latitude) | np.isnan(longitude)))
+    if validos.size == 0:
+        return nomes
+
+    indices, distancias = lugares.k_vizinhos_lote(latitude[validos], longitude[validos], 1)
+    for i, indice, distancia in zip(validos, indices[:, 0], distancias[:, 0]):
+        if distancia <= distancia_maxima:
+            nomes[i] = lugares.ids[indice]
+    return nomes
+
+def carregar_referencias(limites=LIMITES_DISTRITOS, concelhos=LIMITES_CONCELHOS, lugares=LUGARES, propriedade=None):
+    """
+    Carrega os limites que existirem: polígonos dos distritos (ou, na falta
+    deles, as localidades) e dos concelhos. Devolve None se não houver como
+    atribuir o distrito.
+    """
+    referencias = {}
+    if limites and os.path.exists(limites):
+        referencias["distritos"] = carregar_regioes(limites, propriedade)
+    elif lugares and os.path.exists(lugares):
+        logger.warning(f"⚠️ {limites} não existe; distrito aproximado pela localidade mais próxima ({lugares})")
+        referencias["lugares"] = carregar_lugares(lugares)
+    if not referencias:
+        return None
+    if concelhos and os.path.exists(concelhos):
+        referencias["concelhos"] = carregar_regioes(concelhos, propriedade)
+    return referencias
+
+def regiao_esperada(clube):
+    """
+    Distrito indicado pelas associações de futebol no filtro do clube (se houver)
+    """
+    for competicao in clube.get("filtro") or []:
+        partes = competicao.split("-")
+        if len(partes) >= 3 and dobrar_texto(partes[1]) in DISTRITO_DA_AF:
+            return DISTRITO_DA_AF[dobrar_texto(partes[1])]
+    return None
+
+def _preencher(clube, campo, valor, substituir, divergentes):
+    """
+    Grava `valor` em clube[campo] se o campo estiver vazio (ou com `substituir`,
+    exceto se estiver em campos_manuais). Um valor existente que difere do
+    calculado é mantido e vai para `divergentes`.
+    """
+    if valor is None:
+        return
+    atual = clube.get(campo)
+    manual = campo in (clube.get("campos_manuais") or [])
+    if atual and (manual or not substituir):
+        if atual != valor:
+            divergentes.append({"id": clube.get("id"), "club": clube.get("club"),
+                                campo: atual, "calculado": valor})
+        return
+    clube[campo] = valor
+
+def enriquecer(dados_clubes, distritos=None, concelhos=None, lugares=None, substituir=False):
+    """
+    Preenche "distrito" (e "concelho") a partir das coordenadas e devolve o relatório.
+    O distrito vem dos polígonos de `distritos` ou, sem eles, das localidades em `lugares`.
+    Os valores que já existem (ex: corrigidos à mão) só são substituídos com `substituir`.
+    """
+    colunas = carregar_colunas(dados_clubes)
+    lat, lon = colunas["latitude"], colunas["longitude"]
+    em_portugal = ~verificar_caixas(colunas) & ~(np.isnan(lat) | np.isnan(lon))
+
+    if distritos:
+        nomes_distritos = nomes_por_regioes(lat, lon, distritos)
+    elif lugares is not None:
+        # As localidades não têm limites: só se atribui distrito a pontos em Portugal
+        nomes_distritos = [nome if em_portugal[i] else None
+                           for i, nome in enumerate(nomes_por_lugares(lat, lon, lugares))]
+    else:
+        raise ValueError("é preciso indicar os polígonos dos distritos ou as localidades")
+    nomes_concelhos = nomes_por_regioes(lat, lon, concelhos) if concelhos else None
+
+    sem_distrito, divergentes, mantidos = [], [], []
+    for i, clube in enumerate(dados_clubes):
+        distrito = nomes_distritos[i]
+        _preencher(clube, "distrito", distrito, substituir, mantidos)
+        if nomes_concelhos is not None:
+            _preencher(clube, "concelho", nomes_concelhos[i], substituir, mantidos)
+
+        if distrito is None:
+            if em_portugal[i] and not clube.get("distrito"):
+                sem_distrito.append({"id": clube.get("id"), "latitude": float(lat[i]), "longitude": float(lon[i])})
+            continue
+
+        esperado = regiao_esperada(clube)
+        if esperado and dobrar_texto(esperado) not in dobrar_texto(distrito):
+            divergentes.append({"id": clube.get("id"), "club": clube.get("club"),
+                                "distrito": distrito, "esperado": esperado})
+
+    return {
+        "total_clubes": len(dados_clubes),
+        "com_distrito": sum(1 for clube in dados_clubes if clube.get("distrito")),
+        "sem_distrito": sem_distrito,
+        "distrito_divergente": divergentes,
+        "valor_existente_divergente": mantidos,
+    }
+
+def main():
+    """Atribui distrito/concelho a cada clube a partir das coordenadas"""
+    parser = argparse.ArgumentParser(description="Atribui o distrito (e concelho) de cada clube pelas coordenadas")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("--limites", default=LIMITES_DISTRITOS, help="GeoJSON com os limites dos distritos")
+    parser.add_argument("--concelhos", default=LIMITES_CONCELHOS, help="GeoJSON com os limites dos concelhos (opcional)")
+    parser.add_argument("--lugares", default=LUGARES,
+                        help="CSV de localidades usado quando não há GeoJSON dos distritos")
+    parser.add_argument("--propriedade", help="propriedade do GeoJSON com o nome da região")
+    parser.add_argument("--relatorio", help="escreve o relatório JSON neste ficheiro")
+    parser.add_argument("--escrever", action="store_true",
+                        help="grava os campos no ficheiro de clubes (só com os GeoJSON dos limites)")
+    parser.add_argument("--substituir", action="store_true",
+                        help="recalcula também os campos já preenchidos (exceto os de campos_manuais)")
+    args = parser.parse_args()
+
+    try:
+        referencias = carregar_referencias(args.limites, args.concelhos, args.lugares, args.propriedade)
+    except OSError as e:
+        logger.error(f"❌ Não foi possível ler os limites: {e}")
+        sys.exit(2)
+    if referencias is None:
+        logger.error(f"❌ Não há limites dos distritos ({args.limites}) nem localidades ({args.lugares})")
+        sys.exit(2)
+    if args.escrever and "lugares" in referencias:
+        # A localidade mais próxima é só uma aproximação: fica no build, não no clubes.json
+        logger.error(f"❌ --escrever precisa dos limites dos distritos em {args.limites}")
+        sys.exit(2)
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    relatorio = enriquecer(dados_clubes, substituir=args.substituir, **referencias)
+    logger.info(f"📊 {relatorio['com_distrito']}/{relatorio['total_clubes']} clubes com distrito, "
+                f"{len(relatorio['sem_distrito'])} em Portugal sem distrito, "
+                f"{len(relatorio['distrito_divergente'])} com distrito diferente do da associação, "
+                f"{len(relatorio['valor_existente_divergente'])} valores existentes diferentes do calculado")
+
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        logger.info(f"📄 Relatório escrito em {args.relatorio}")
+
+    if args.escrever:
+        with open(args.arquivo, "w", encoding="utf-8") as f:
+            json.dump(dados_clubes, f, ensure_ascii=False, indent=4)
+        logger.info(f"✅ Dados salvos em {args.arquivo}")
+
+if __name__ == "__main__":
+    main()
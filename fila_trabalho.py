@@ -0,0 +1,350 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import zlib
+
+import scraper
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ARQUIVO_FILA = "fila.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS itens (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    disponivel_em REAL NOT NULL DEFAULT 0,
+    trabalhador TEXT,
+    resultado TEXT,
+    erro TEXT,
+    atualizado REAL
+);
+CREATE INDEX IF NOT EXISTS idx_itens_estado ON itens (estado, disponivel_em);
+CREATE TABLE IF NOT EXISTS orcamento (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    fichas REAL NOT NULL,
+    atualizado REAL NOT NULL
+);
+"""
+
+def shard_de(clube_id):
+    """
+    Shard estável de um clube (o mesmo em qualquer processo ou máquina)
+    """
+    return zlib.crc32(str(clube_id).encode("utf-8"))
+
+class FilaTrabalho:
+    """
+    Fila de URLs de clubes em SQLite, partilhável entre processos (ou máquinas
+    com o mesmo sistema de ficheiros).
+
+    Cada item reclamado fica "em_curso" com um lease até `disponivel_em`; se o
+    trabalhador morrer, o item volta a ficar visível quando o lease expira.
+    Os erros voltam a pôr o item na fila com backoff até `max_tentativas`.
+    """
+
+    def __init__(self, caminho=ARQUIVO_FILA, timeout_visibilidade=300, max_tentativas=5,
+                 clubes_por_segundo=0.5, rajada=1, backoff=30):
+        self.timeout_visibilidade = timeout_visibilidade
+        self.max_tentativas = max_tentativas
+        self.backoff = backoff
+        self.clubes_por_segundo = clubes_por_segundo
+        self.rajada = rajada
+        # isolation_level=None: as transações são abertas explicitamente com BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(caminho, timeout=60, isolation_level=None)
+        self.conn.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.conn.close()
+
+    def _transacao(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def adicionar(self, clubes):
+        """
+        Adiciona pares (id, url) à fila, ignorando IDs já existentes
+        """
+        agora = time.time()
+        self._transacao()
+        try:
+            antes = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO itens (id, url, shard, atualizado) VALUES (?, ?, ?, ?)",
+                ((clube_id, url, shard_de(clube_id), agora) for clube_id, url in clubes))
+            adicionados = self.conn.total_changes - antes
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return adicionados
+
+    def reclamar(self, trabalhador, shard=0, total_shards=1, quantidade=1):
+        """
+        Reclama até `quantidade` itens visíveis do shard indicado e devolve [(id, url)]
+        """
+        agora = time.time()
+        self._transacao()
+        try:
+            # Leases expirados sem tentativas restantes passam a falhados
+            self.conn.execute(
+                "UPDATE itens SET estado = 'falhado', erro = 'lease expirado', atualizado = ? "
+                "WHERE estado = 'em_curso' AND disponivel_em <= ? AND tentativas >= ?",
+                (agora, agora, self.max_tentativas))
+            linhas = self.conn.execute(
+                "SELECT id, url FROM itens "
+                "WHERE estado IN ('pendente', 'em_curso') AND disponivel_em <= ? "
+                "AND shard % ? = ? ORDER BY tentativas, id LIMIT ?",
+                (agora, total_shards, shard, quantidade)).fetchall()
+            self.conn.executemany(
+                "UPDATE itens SET estado = 'em_curso', tentativas = tentativas + 1, "
+                "disponivel_em = ?, trabalhador = ?, atualizado = ? WHERE id = ?",
+                ((agora + self.timeout_visibilidade, trabalhador, agora, clube_id) for clube_id, _ in linhas))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return linhas
+
+    def concluir(self, clube_id, trabalhador, resultado):
+        """
+        Marca o item como concluído; devolve False se o lease já não pertence a este trabalhador
+        """
+        cursor = self.conn.execute(
+            "UPDATE itens SET estado = 'concluido', resultado = ?, erro = NULL, atualizado = ? "
+            "WHERE id = ? AND trabalhador = ? AND estado = 'em_curso'",
+            (json.dumps(resultado, ensure_ascii=False) if resultado is not None else None,
+             time.time(), clube_id, trabalhador))
+        return cursor.rowcount == 1
+
+    def falhar(self, clube_id, trabalhador, erro, backoff=None):
+        """
+        Devolve o item à fila com backoff exponencial, ou marca-o como falhado
+        """
+        backoff = self.backoff if backoff is None else backoff
+        agora = time.time()
+        self._transacao()
+        try:
+            linha = self.conn.execute(
+                "SELECT tentativas FROM itens WHERE id = ? AND trabalhador = ? AND estado = 'em_curso'",
+                (clube_id, trabalhador)).fetchone()
+            if linha:
+                tentativas = linha[0]
+                estado = "falhado" if tentativas >= self.max_tentativas else "pendente"
+                self.conn.execute(
+                    "UPDATE itens SET estado = ?, erro = ?, disponivel_em = ?, atualizado = ? WHERE id = ?",
+                    (estado, str(erro), agora + backoff * (2 ** (tentativas - 1)), agora, clube_id))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def consumir_orcamento(self):
+        """
+        Token bucket global partilhado por todos os trabalhadores.
+        Devolve 0 se o próximo clube pode avançar, ou os segundos a esperar.
+        """
+        if self.clubes_por_segundo <= 0:
+            return 0
+        agora = time.time()
+        self._transacao()
+        try:
+            linha = self.conn.execute("SELECT fichas, atualizado FROM orcamento WHERE id = 1").fetchone()
+            fichas, atualizado = linha if linha else (self.rajada, agora)
+            fichas = min(self.rajada, fichas + (agora - atualizado) * self.clubes_por_segundo)
+            espera = 0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / self.clubes_por_segundo
+            self.conn.execute("INSERT OR REPLACE INTO orcamento (id, fichas, atualizado) VALUES (1, ?, ?)",
+                              (fichas, agora))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return espera
+
+    def aguardar_orcamento(self):
+        while True:
+            espera = self.consumir_orcamento()
+            if espera <= 0:
+                return
+            time.sleep(espera)
+
+    def contagens(self):
+        return dict(self.conn.execute("SELECT estado, COUNT(*) FROM itens GROUP BY estado").fetchall())
+
+    def pendentes(self, shard=0, total_shards=1):
+        """
+        Nº de itens do shard que ainda podem vir a ser processados
+        """
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM itens WHERE estado IN ('pendente', 'em_curso') AND shard % ? = ?",
+            (total_shards, shard)).fetchone()[0]
+
+    def resultados(self):
+        """
+        Itera pelos resultados concluídos, por ordem de ID
+        """
+        for (resultado,) in self.conn.execute(
+                "SELECT resultado FROM itens WHERE estado = 'concluido' AND resultado IS NOT NULL ORDER BY id"):
+            yield json.loads(resultado)
+
+def ler_shard(texto):
+    """
+    Lê "i/n" (0 <= i < n) para o argparse
+    """
+    try:
+        shard, total_shards = (int(x) for x in texto.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard inválido: {texto!r} (formato i/n, ex: 2/4)")
+    if total_shards < 1 or not 0 <= shard < total_shards:
+        raise argparse.ArgumentTypeError(f"shard inválido: {texto!r} (é preciso 0 <= i < n)")
+    return shard, total_shards
+
+def popular(fila, arquivo_csv="clubes_zerozero.csv", arquivo_json="clubes.json", incluir_existentes=False):
+    """
+    Coloca na fila os clubes do CSV que ainda não estão no clubes.json
+    """
+    ids_existentes, urls_existentes = set(), set()
+    if not incluir_existentes:
+        existentes = scraper.carregar_dados_existentes(arquivo_json)
+        ids_existentes = {clube.get('id') for clube in existentes}
+        urls_existentes = {clube.get('url') for clube in existentes}
+
+    itens = []
+    for clube_csv in scraper.carregar_clubes_csv(arquivo_csv):
+        clube_id = scraper.extrair_id_clube(clube_csv['url'])
+        if clube_id and clube_id not in ids_existentes and clube_csv['url'] not in urls_existentes:
+            itens.append((clube_id, clube_csv['url']))
+
+    adicionados = fila.adicionar(itens)
+    logger.info(f"📋 {adicionados} clubes adicionados à fila ({len(itens) - adicionados} já lá estavam)")
+
+def trabalhar(fila, nome, shard=0, total_shards=1, continuo=False, pausa_vazia=10):
+    """
+    Processa itens do shard até a fila ficar vazia (ou indefinidamente com continuo=True)
+    """
+    processados = 0
+    while True:
+        fila.aguardar_orcamento()
+        itens = fila.reclamar(nome, shard, total_shards)
+        if not itens:
+            if not continuo and fila.pendentes(shard, total_shards) == 0:
+                break
+            # Há itens com lease de outro trabalhador ou em backoff: esperar
+            time.sleep(pausa_vazia)
+            continue
+
+        for clube_id, url in itens:
+            try:
+                dados = scraper.obter_dados_clube(url)
+            except Exception as e:
+                dados = None
+                logger.error(f"Erro ao processar {url}: {e}")
+            if dados:
+                if not fila.concluir(clube_id, nome, dados):
+                    logger.warning(f"⚠️ Lease perdido para {clube_id}, resultado descartado")
+                processados += 1
+            else:
+                fila.falhar(clube_id, nome, "sem dados")
+
+    logger.info(f"✅ Trabalhador {nome} (shard {shard}/{total_shards}) terminou: {processados} clubes")
+
+def juntar_resultado(clube, resultado):
+    """
+    Atualiza um clube existente com um resultado novo do scraper. Valores vazios
+    (ex: coordenadas None quando a geocodificação falha) não apagam os existentes
+    e os campos listados em "campos_manuais" (corrigidos à mão) não são alterados.
+    """
+    manuais = set(clube.get('campos_manuais') or [])
+    juntado = dict(clube)
+    for campo, valor in resultado.items():
+        if campo == 'id' or campo in manuais or valor is None or valor in ("", [], {}):
+            continue
+        juntado[campo] = valor
+    return juntado
+
+def coordenar(fila, arquivo_json="clubes.json"):
+    """
+    Junta os resultados da fila ao clubes.json. Um resultado para um clube que
+    já existe (mesmo ID ou URL, ex: popular --incluir-existentes) atualiza os
+    campos obtidos pelo scraper (ver juntar_resultado), mantendo o ID e os
+    restantes campos (ex: filtro).
+    """
+    resultados = {clube['id']: clube for clube in fila.resultados()}
+    por_url = {clube.get('url'): clube_id for clube_id, clube in resultados.items() if clube.get('url')}
+
+    ids_escritos = set()
+    novos = atualizados = 0
+    with scraper.EscritorJsonStream(arquivo_json) as escritor:
+        for clube in scraper.carregar_dados_existentes(arquivo_json):
+            clube_id = clube.get('id')
+            if not clube_id or clube_id in ids_escritos:
+                continue
+            id_resultado = clube_id if clube_id in resultados else por_url.get(clube.get('url'))
+            if id_resultado in resultados:
+                clube = juntar_resultado(clube, resultados.pop(id_resultado))
+                atualizados += 1
+            escritor.escrever(clube)
+            ids_escritos.add(clube_id)
+        for clube_id, clube in resultados.items():
+            if clube_id not in ids_escritos:
+                escritor.escrever(clube)
+                ids_escritos.add(clube_id)
+                novos += 1
+    logger.info(f"🎯 {novos} clubes novos e {atualizados} atualizados em {arquivo_json}")
+
+def main():
+    """Fila de trabalho partilhada para scraping com vários processos"""
+    parser = argparse.ArgumentParser(description="Scraping distribuído com uma fila SQLite com leases")
+    parser.add_argument("--fila", default=ARQUIVO_FILA, help="ficheiro SQLite da fila")
+    parser.add_argument("--timeout-visibilidade", type=float, default=300,
+                        help="segundos até um item reclamado voltar a ficar visível")
+    parser.add_argument("--max-tentativas", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=30,
+                        help="espera base (s) antes de repetir um clube falhado (duplica a cada tentativa)")
+    parser.add_argument("--clubes-por-segundo", type=float, default=0.5,
+                        help="orçamento global de clubes por segundo, partilhado por todos os trabalhadores "
+                             "(cada clube faz pelo menos 2 pedidos: zerozero.pt e Nominatim)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_popular = comandos.add_parser("popular", help="adiciona os clubes do CSV à fila")
+    p_popular.add_argument("--csv", default="clubes_zerozero.csv")
+    p_popular.add_argument("--incluir-existentes", action="store_true",
+                           help="inclui clubes que já estão no clubes.json (o coordenar atualiza-os)")
+
+    p_trabalhar = comandos.add_parser("trabalhar", help="processa itens da fila")
+    p_trabalhar.add_argument("--shard", type=ler_shard, default="0/1", help="shard deste trabalhador, ex: 2/4")
+    p_trabalhar.add_argument("--nome", default=f"{socket.gethostname()}-{os.getpid()}")
+    p_trabalhar.add_argument("--continuo", action="store_true", help="não termina quando a fila esvazia")
+
+    comandos.add_parser("coordenar", help="junta os resultados ao clubes.json")
+    comandos.add_parser("estado", help="mostra o nº de itens por estado")
+
+    args = parser.parse_args()
+    fila = FilaTrabalho(args.fila, args.timeout_visibilidade, args.max_tentativas, args.clubes_por_segundo,
+                        backoff=args.backoff)
+
+    try:
+        if args.comando == "popular":
+            popular(fila, args.csv, incluir_existentes=args.incluir_existentes)
+        elif args.comando == "trabalhar":
+            shard, total_shards = args.shard
+            trabalhar(fila, args.nome, shard, total_shards, args.continuo)
+        elif args.comando == "coordenar":
+            coordenar(fila)
+        logger.info(f"📊 Estado da fila: {fila.contagens()}")
+    finally:
+        fila.fechar()
+
+if __name__ == "__main__":
+    main()
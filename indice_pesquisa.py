@@ -0,0 +1,122 @@
+import argparse
+import json
+import logging
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CAMPOS_PESQUISA = ("club", "stadium", "address", "distrito", "concelho")
+
+def dobrar_texto(texto):
+    """
+    Remove acentos e passa para minúsculas (ex: "Cabeçudo" -> "cabecudo")
+    """
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return sem_acentos.lower()
+
+def extrair_tokens(texto):
+    """
+    Divide o texto dobrado em tokens alfanuméricos.
+    Palavras compostas com hífen também geram a forma junta ("beira-mar" -> "beiramar").
+    """
+    dobrado = dobrar_texto(texto)
+    tokens = re.findall(r'[a-z0-9]+', dobrado)
+    for composto in re.findall(r'[a-z0-9]+(?:-[a-z0-9]+)+', dobrado):
+        tokens.append(composto.replace("-", ""))
+    return tokens
+
+def construir_indice(dados_clubes, campos=CAMPOS_PESQUISA, versao_dados=None):
+    """
+    Constrói um índice invertido com tokens ordenados, para pesquisa por prefixo
+    com pesquisa binária (equivalente a uma trie achatada). `versao_dados` é o
+    hash da versão dos clubes (o mapa ignora um índice de outra versão).
+    """
+    ids = []
+    postings = defaultdict(set)
+
+    for clube in dados_clubes:
+        clube_id = clube.get("id")
+        if not clube_id:
+            continue
+        posicao = len(ids)
+        ids.append(clube_id)
+        for campo in campos:
+            for token in extrair_tokens(clube.get(campo)):
+                postings[token].add(posicao)
+
+    tokens = sorted(postings)
+    return {
+        "versao": 1,
+        "versao_dados": versao_dados,
+        "total": len(ids),
+        "campos": list(campos),
+        "ids": ids,
+        "tokens": tokens,
+        "postings": [sorted(postings[token]) for token in tokens],
+    }
+
+def pesquisar(indice, consulta):
+    """
+    Devolve os IDs dos clubes cujos tokens começam por todos os termos da consulta
+    (mesmo algoritmo usado em script.js)
+    """
+    termos = extrair_tokens(consulta)
+    if not termos:
+        return []
+
+    tokens = indice["tokens"]
+    resultado = None
+    for termo in termos:
+        encontrados = set()
+        i = bisect_left(tokens, termo)
+        while i < len(tokens) and tokens[i].startswith(termo):
+            encontrados.update(indice["postings"][i])
+            i += 1
+        resultado = encontrados if resultado is None else resultado & encontrados
+        if not resultado:
+            return []
+
+    return [indice["ids"][p] for p in sorted(resultado)]
+
+def salvar_indice(indice, arquivo_saida="dados/indice_pesquisa.json"):
+    """
+    Salva o índice em JSON compacto
+    """
+    pasta = os.path.dirname(arquivo_saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(arquivo_saida, "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, separators=(",", ":"))
+    logger.info(f"✅ Índice de pesquisa salvo em {arquivo_saida} "
+                f"({indice['total']} clubes, {len(indice['tokens'])} tokens)")
+
+def main():
+    """Gera o índice de pesquisa a partir de clubes.json"""
+    parser = argparse.ArgumentParser(description="Gera o índice de pesquisa (sem acentos) para o mapa")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("--saida", default="dados/indice_pesquisa.json", help="ficheiro do índice")
+    parser.add_argument("--consulta", help="testa uma pesquisa no índice gerado")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    indice = construir_indice(dados_clubes)
+
+    if args.consulta:
+        resultados = pesquisar(indice, args.consulta)
+        logger.info(f"🔍 '{args.consulta}': {len(resultados)} resultados - {resultados[:20]}")
+        return
+
+    salvar_indice(indice, args.saida)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import logging
+
+from versoes import json_canonico
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Campos necessários para os marcadores, a lista lateral e os filtros; os
+# restantes (equipamentos, address, url, ...) vão para os ficheiros de detalhes
+CAMPOS_RESUMO = ("id", "club", "stadium", "latitude", "longitude", "logo", "filtro", "distrito", "concelho")
+N_BALDES_DETALHES = 32
+
+def balde_de(clube_id, n_baldes=N_BALDES_DETALHES):
+    """
+    Balde de detalhes de um clube: FNV-1a de 32 bits do ID (o mesmo cálculo é
+    feito em script.js para saber que ficheiro pedir)
+    """
+    h = 0x811C9DC5
+    for byte in str(clube_id).encode("utf-8"):
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h % n_baldes
+
+def construir_resumo(dados_clubes, campos=CAMPOS_RESUMO):
+    """
+    Resumo colunar dos clubes: uma lista por clube com os valores de `campos`
+    (só os que existem nos dados) e o filtro como índices numa tabela de competições
+    """
+    campos = [c for c in campos if c == "id" or any(c in clube for clube in dados_clubes)]
+    competicoes = sorted({c for clube in dados_clubes for c in clube.get("filtro") or []})
+    posicao = {competicao: i for i, competicao in enumerate(competicoes)}
+
+    linhas = []
+    for clube in dados_clubes:
+        if not clube.get("id"):
+            continue
+        linha = []
+        for campo in campos:
+            valor = clube.get(campo)
+            if campo == "filtro" and valor is not None:
+                valor = [posicao[c] for c in valor]
+            linha.append(valor)
+        linhas.append(linha)
+
+    return {
+        "versao": 1,
+        "campos": campos,
+        "competicoes": competicoes,
+        "clubes": linhas,
+    }
+
+def construir_detalhes(dados_clubes, n_baldes=N_BALDES_DETALHES, campos_resumo=CAMPOS_RESUMO):
+    """
+    Divide os campos que não estão no resumo por `n_baldes` ficheiros {id: {campo: valor}}
+    """
+    baldes = [{} for _ in range(n_baldes)]
+    for clube in dados_clubes:
+        clube_id = clube.get("id")
+        if not clube_id:
+            continue
+        baldes[balde_de(clube_id, n_baldes)][clube_id] = {
+            campo: valor for campo, valor in clube.items() if campo not in campos_resumo
+        }
+    return baldes
+
+def main():
+    """Compara o tamanho do clubes.json com o do resumo e dos detalhes"""
+    parser = argparse.ArgumentParser(description="Mostra o tamanho do resumo dos marcadores e dos detalhes por clube")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("--baldes", type=int, default=N_BALDES_DETALHES)
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    completo = len(json_canonico(dados_clubes).encode("utf-8"))
+    resumo = len(json_canonico(construir_resumo(dados_clubes)).encode("utf-8"))
+    detalhes = [len(json_canonico(b).encode("utf-8")) for b in construir_detalhes(dados_clubes, args.baldes)]
+    logger.info(f"📦 Completo: {completo} bytes | resumo: {resumo} bytes ({resumo / completo:.0%}) | "
+                f"detalhes: {args.baldes} ficheiros de {min(detalhes)}-{max(detalhes)} bytes")
+
+if __name__ == "__main__":
+    main()
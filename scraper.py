@@ -9,11 +9,83 @@ from urllib.parse import urljoin, urlparse, parse_qs
 import os
 import csv
 import hashlib
+import sys
+import tracemalloc
+
+from competicoes import COMPETICOES
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Configure loggings
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Configurações (podem ser alteradas por variáveis de ambiente, ex: para testes de carga locais)
+BASE_URL = os.environ.get("ZEROZERO_BASE_URL", "https://www.zerozero.pt")
+NOMINATIM_DOMAIN = os.environ.get("NOMINATIM_DOMAIN", "nominatim.openstreetmap.org")
+NOMINATIM_SCHEME = os.environ.get("NOMINATIM_SCHEME", "https")
+NOMINATIM_DELAY = float(os.environ.get("NOMINATIM_DELAY", "1"))
+TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "15"))
+MAX_TENTATIVAS = int(os.environ.get("SCRAPER_MAX_TENTATIVAS", "3"))
+DELAY_TENTATIVA = float(os.environ.get("SCRAPER_DELAY_TENTATIVA", "3"))
+MAX_RETRY_AFTER = float(os.environ.get("SCRAPER_MAX_RETRY_AFTER", "60"))
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def _espera_retry_after(response):
+    """
+    Lê o cabeçalho Retry-After (em segundos) de uma resposta 429/503
+    """
+    valor = response.headers.get("Retry-After") if response is not None else None
+    if not valor:
+        return None
+    try:
+        return min(float(valor), MAX_RETRY_AFTER)
+    except ValueError:
+        return None
+
+def _vale_a_pena_repetir(response):
+    """
+    Só se repetem falhas de ligação/timeout (sem resposta), 429 e 5xx; os
+    restantes 4xx (404, 403, 410...) não mudam com nova tentativa
+    """
+    return response is None or response.status_code == 429 or response.status_code >= 500
+
+def fazer_requisicao(url, max_tentativas=None):
+    """
+    Faz um GET com retry. Respeita o Retry-After em respostas 429/503 e usa
+    backoff exponencial em falhas de ligação, timeouts e 5xx. Devolve None se
+    todas falharem ou logo num 4xx definitivo.
+    """
+    max_tentativas = max_tentativas or MAX_TENTATIVAS
+    for tentativa in range(max_tentativas):
+        response = None
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            if not _vale_a_pena_repetir(response):
+                logger.error(f"Erro ao aceder {url}: {e}")
+                return None
+            if tentativa == max_tentativas - 1:
+                logger.error(f"Erro final ao aceder {url}: {e}")
+                return None
+
+            espera = None
+            if response is not None and response.status_code in (429, 503):
+                espera = _espera_retry_after(response)
+            if espera is None:
+                espera = DELAY_TENTATIVA * (2 ** tentativa)
+            logger.warning(f"⚠ Tentativa {tentativa + 1} falhou para {url} ({e}), nova tentativa em {espera:.1f}s")
+            time.sleep(espera)
+    return None
+
 def extrair_id_clube(url):
     """
     Extrai o ID do clube da URL do ZeroZero
@@ -43,20 +115,18 @@ def extrair_id_clube(url):
     
     return None
 
-def descobrir_clubes_competicao(url_competicao, max_clubes=50):
+def descobrir_clubes_competicao(url_competicao, max_clubes=None):
     """
-    Descobre clubes a partir de uma página de competição
+    Descobre clubes a partir de uma página de competição (pela ordem em que
+    aparecem; max_clubes=None não limita)
     """
     clubes_descobertos = {}
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
         logger.info(f"🔍 Descobrindo clubes em: {url_competicao}")
-        r = requests.get(url_competicao, headers=headers, timeout=15)
-        r.raise_for_status()
+        r = fazer_requisicao(url_competicao)
+        if r is None:
+            return clubes_descobertos
         soup = BeautifulSoup(r.text, 'html.parser')
         
         # Procura por links de clubes
@@ -70,12 +140,15 @@ def descobrir_clubes_competicao(url_competicao, max_clubes=50):
         team_links = soup.find_all('a', href=re.compile(r'team\.php\?id=\d+'))
         links_clubes.extend([link['href'] for link in team_links])
         
-        # Remove duplicados e converte para URLs completas
-        links_unicos = list(set(links_clubes))
+        # Remove duplicados mantendo a ordem da página e converte para URLs completas
+        links_unicos = list(dict.fromkeys(links_clubes))
+        if max_clubes is not None and len(links_unicos) > max_clubes:
+            logger.warning(f"⚠ {len(links_unicos)} ligações de clubes, apenas as primeiras {max_clubes} serão usadas")
+            links_unicos = links_unicos[:max_clubes]
         
-        for link in links_unicos[:max_clubes]:
+        for link in links_unicos:
             if not link.startswith('http'):
-                link = urljoin('https://www.zerozero.pt', link)
+                link = urljoin(BASE_URL, link)
             
             clube_id = extrair_id_clube(link)
             if clube_id and clube_id not in clubes_descobertos:
@@ -91,33 +164,13 @@ def descobrir_clubes_competicao(url_competicao, max_clubes=50):
 
 def descobrir_clubes_multiplas_competicoes():
     """
-    Descobre clubes de múltiplas competições portuguesas
+    Descobre clubes das competições-semente (para seguir as ligações entre
+    competições, usar o crawler.py)
     """
-    competicoes = [
-        "https://www.zerozero.pt/edicao/af-algarve-1-divisao-1-fase-2025-26/203185" ,
-        "https://www.zerozero.pt/competicao/af-aveiro-campeonato-de-elite",
-        "https://www.zerozero.pt/competicao/af-beja-i-divisao",
-        "https://www.zerozero.pt/competicao/af-braga-pro-nacional",
-        "https://www.zerozero.pt/competicao/af-braganca-divisao-honra",
-        "https://www.zerozero.pt/competicao/af-castelo-branco-i-divisao",
-        "https://www.zerozero.pt/competicao/af-evora-divisao-elite-pro-nacional",
-        "https://www.zerozero.pt/competicao/af-coimbra-divisao-elite",
-        "https://www.zerozero.pt/competicao/af-guarda-1-divisao",
-        "https://www.zerozero.pt/competicao/af-leiria-divisao-honra",
-        "https://www.zerozero.pt/competicao/af-madeira-divisao-de-honra",
-        "https://www.zerozero.pt/competicao/af-portalegre-taca-honra",
-        "https://www.zerozero.pt/competicao/af-porto-divisao-liga-pro-2383",
-        "https://www.zerozero.pt/competicao/af-santarem-1-divisao",
-        "https://www.zerozero.pt/competicao/af-setubal-i-divisao",
-        "https://www.zerozero.pt/competicao/af-viana-do-castelo-1-divisao",
-        "https://www.zerozero.pt/competicao/af-vila-real-divisao-de-honra",
-        "https://www.zerozero.pt/competicao/af-viseu-divisao-honra"
-    ]
-    
     todos_clubes = {}
     
-    for competicao in competicoes:
-        clubes_comp = descobrir_clubes_competicao(competicao, max_clubes=30)
+    for competicao in COMPETICOES:
+        clubes_comp = descobrir_clubes_competicao(competicao)
         todos_clubes.update(clubes_comp)
         time.sleep(2)  # Pausa entre competições
     
@@ -148,12 +201,9 @@ def obter_dados_clube(url):
     Extrai dados de um clube a partir da sua página no zerozero.pt
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        r = requests.get(url, headers=headers, timeout=15)
-        r.raise_for_status()
+        r = fazer_requisicao(url)
+        if r is None:
+            return None
         soup = BeautifulSoup(r.text, 'html.parser')
         
         # ID do clube
@@ -272,7 +322,7 @@ def obter_dados_clube(url):
             if logo_url.startswith("//"):
                 logo_url = "https:" + logo_url
             elif logo_url.startswith("/"):
-                logo_url = "https://www.zerozero.pt" + logo_url
+                logo_url = BASE_URL + logo_url
         
         # Procurar equipamentos/kits
         equipamentos = []
@@ -309,7 +359,7 @@ def obter_dados_clube(url):
                 if kit_url.startswith("//"):
                     kit_url = "https:" + kit_url
                 elif kit_url.startswith("/"):
-                    kit_url = "https://www.zerozero.pt" + kit_url
+                    kit_url = BASE_URL + kit_url
                 
                 # Determinar tipo de equipamento (casa, fora, alternativo)
                 kit_type = "desconhecido"
@@ -400,11 +450,17 @@ def obter_dados_clube(url):
                     cidade = morada
                     break
         
+        # A extração terminou: liberta a árvore HTML e a resposta antes da
+        # geocodificação (que inclui uma pausa) para não as manter em memória
+        soup.decompose()
+        soup = r = all_images = estadio_links = rows = None
+        
         # Obter coordenadas via Nominatim - apenas usar nome do estádio
         lat, lon = None, None
         if estadio_nome:
             try:
-                geolocator = Nominatim(user_agent="clubes-portugal-discovery")
+                geolocator = Nominatim(user_agent="clubes-portugal-discovery",
+                                       domain=NOMINATIM_DOMAIN, scheme=NOMINATIM_SCHEME)
                 
                 # Usar apenas o nome do estádio para evitar coordenadas incorretas
                 search_term = f"{estadio_nome}, Portugal"
@@ -418,7 +474,7 @@ def obter_dados_clube(url):
                 except Exception as search_error:
                     logger.warning(f"Erro na pesquisa de coordenadas para estádio '{estadio_nome}': {search_error}")
                 
-                time.sleep(1)  # Rate limit do Nominatim
+                time.sleep(NOMINATIM_DELAY)  # Rate limit do Nominatim
                 
             except Exception as geo_error:
                 logger.error(f"Erro na geocodificação: {geo_error}")
@@ -518,13 +574,155 @@ def salvar_dados(dados_clubes, arquivo_json="clubes.json"):
         logger.error(f"Erro ao salvar: {e}")
         return False
 
+class EscritorJsonStream:
+    """
+    Escreve uma lista JSON clube a clube num ficheiro temporário e só substitui
+    o ficheiro final no fim, com o mesmo formato que salvar_dados (indent=4).
+
+    Se a escrita for interrompida (erro ou Ctrl-C), o ficheiro é cortado no fim
+    do último clube completo e a lista é fechada na mesma: com
+    `substituir_se_interrompido` o ficheiro final é substituído pelo parcial
+    (útil quando este já contém todos os clubes anteriores); senão o parcial
+    fica em `<arquivo>.tmp`.
+    """
+
+    def __init__(self, arquivo_json="clubes.json", substituir_se_interrompido=False):
+        self.arquivo_json = arquivo_json
+        self.arquivo_tmp = f"{arquivo_json}.tmp"
+        self.substituir_se_interrompido = substituir_se_interrompido
+        self.total = 0
+        self.f = None
+        self.fim_completo = 0
+
+    def __enter__(self):
+        self.f = open(self.arquivo_tmp, "w", encoding="utf-8")
+        self.f.write("[")
+        self.f.flush()
+        self.fim_completo = self.f.tell()
+        return self
+
+    def escrever(self, clube):
+        texto = json.dumps(clube, ensure_ascii=False, indent=4)
+        self.f.write(("," if self.total else "") + "\n    " + texto.replace("\n", "\n    "))
+        # Cada clube fica no disco logo que é escrito (um scrape longo pode ser interrompido)
+        self.f.flush()
+        self.fim_completo = self.f.tell()
+        self.total += 1
+
+    def _fechar_lista(self):
+        """
+        Corta um clube escrito a meio (ex: disco cheio, Ctrl-C durante o flush) e fecha a lista
+        """
+        try:
+            self.f.close()
+        except OSError:
+            pass  # O que ficou por escrever é cortado a seguir
+        os.truncate(self.arquivo_tmp, self.fim_completo)
+        with open(self.arquivo_tmp, "a", encoding="utf-8") as f:
+            f.write("\n]" if self.total else "]")
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        if tipo_erro is None:
+            self.f.write("\n]" if self.total else "]")
+            self.f.close()
+            os.replace(self.arquivo_tmp, self.arquivo_json)
+            logger.info(f"✅ {self.total} clubes escritos em {self.arquivo_json}")
+            return False
+
+        try:
+            self._fechar_lista()
+        except OSError as e:
+            logger.error(f"Escrita interrompida e não foi possível fechar {self.arquivo_tmp} ({e}); "
+                         f"{self.arquivo_json} não foi alterado")
+            return False
+        if self.substituir_se_interrompido:
+            os.replace(self.arquivo_tmp, self.arquivo_json)
+            logger.warning(f"⚠ Escrita interrompida: {self.total} clubes guardados em {self.arquivo_json}")
+        else:
+            logger.error(f"Escrita interrompida, {self.arquivo_json} não foi alterado; "
+                         f"os {self.total} clubes escritos ficaram em {self.arquivo_tmp}")
+        return False
+
+def relatorio_memoria(top=10):
+    """
+    Regista o pico de RSS do processo e os maiores alocadores do tracemalloc
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        pico_mb = pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+        logger.info(f"🧠 Pico de RSS: {pico_mb:.1f} MB")
+
+    if tracemalloc.is_tracing():
+        atual, pico_python = tracemalloc.get_traced_memory()
+        logger.info(f"🧠 tracemalloc: atual {atual / 1024 / 1024:.1f} MB, pico {pico_python / 1024 / 1024:.1f} MB")
+        for i, estatistica in enumerate(tracemalloc.take_snapshot().statistics("lineno")[:top], 1):
+            logger.info(f"  {i:2d}. {estatistica}")
+
+def main_baixa_memoria():
+    """
+    Modo de baixa memória: os clubes existentes e os novos são escritos à medida
+    que são processados, sem acumular listas intermédias
+    """
+    logger.info("🚀 Iniciando processamento de clubes (modo de baixa memória)...")
+
+    dados_existentes = carregar_dados_existentes()
+    logger.info(f"📋 {len(dados_existentes)} clubes já existem no arquivo")
+    ids_escritos = set()
+    urls_escritos = set()
+    novos = 0
+
+    with EscritorJsonStream() as escritor:
+        for clube in dados_existentes:
+            clube_id = clube.get('id')
+            if clube_id and clube_id not in ids_escritos:
+                escritor.escrever(clube)
+                ids_escritos.add(clube_id)
+                urls_escritos.add(clube.get('url'))
+        dados_existentes = None
+        # A partir daqui o ficheiro parcial já tem todos os clubes anteriores
+        escritor.substituir_se_interrompido = True
+
+        logger.info("📄 Processando clubes do CSV...")
+        for clube_csv in carregar_clubes_csv():
+            url = clube_csv['url']
+            clube_id = extrair_id_clube(url)
+
+            if clube_id and clube_id not in ids_escritos and url not in urls_escritos:
+                logger.info(f"📌 Processando clube do CSV: {clube_csv['nome']}")
+                dados = obter_dados_clube(url)
+                if dados and dados['id'] not in ids_escritos:
+                    escritor.escrever(dados)
+                    ids_escritos.add(dados['id'])
+                    novos += 1
+                time.sleep(3)  # Pausa entre requests
+
+    logger.info(f"🎯 Resultado final: {escritor.total} clubes salvos")
+    logger.info(f"📊 {novos} clubes novos adicionados")
+
 def main():
     """Função principal - processa CSV primeiro, depois descoberta automática"""
+    if "--perfil-memoria" in sys.argv or "--baixa-memoria" in sys.argv:
+        tracemalloc.start()
+
+    try:
+        if "--baixa-memoria" in sys.argv:
+            main_baixa_memoria()
+        else:
+            main_normal()
+    finally:
+        if tracemalloc.is_tracing():
+            relatorio_memoria()
+
+def main_normal():
+    """Processa o CSV e guarda tudo no fim"""
     logger.info("🚀 Iniciando processamento de clubes...")
     
     # Carrega dados existentes
     dados_existentes = carregar_dados_existentes()
     ids_existentes = {clube.get('id') for clube in dados_existentes if clube.get('id')}
+    # O mesmo URL pode ter gerado IDs diferentes no passado (ex: "slbenfica" e "team_benfica")
+    urls_existentes = {clube.get('url') for clube in dados_existentes if clube.get('url')}
     logger.info(f"📋 {len(dados_existentes)} clubes já existem no arquivo")
     
     dados_novos = []
@@ -537,7 +735,7 @@ def main():
         url = clube_csv['url']
         clube_id = extrair_id_clube(url)
         
-        if clube_id and clube_id not in ids_existentes:
+        if clube_id and clube_id not in ids_existentes and url not in urls_existentes:
             logger.info(f"📌 Processando clube do CSV: {clube_csv['nome']}")
             dados = obter_dados_clube(url)
             if dados:  # Só adiciona se tiver coordenadas válidas
@@ -31,10 +31,20 @@ let activeMarkers = new Map();
 let loadMarkersTimeout;
 let currentFilter = { region: 'all', league: 'all', year: 'all' };
 let availableCompetitions = new Set();
+let clubsById = new Map();
+let nearbyIndex = null; // Precomputed nearest clubs from vizinhos.py
+let searchIndex = null; // Precomputed index from dados/indice_pesquisa.json
+let searchMatches = null; // Set of club IDs matching the current search (null = no search)
+let searchQuery = '';
+let fallbackSearchTokens = null; // Club ID -> tokens, for searching without the index
+let allDetailsLoading = null; // Promise of every detail shard (the fallback search needs the address)
+// Same fields as CAMPOS_PESQUISA in indice_pesquisa.py
+const SEARCH_FIELDS = ['club', 'stadium', 'address', 'distrito', 'concelho'];
 let competitionStructure = {
     europa: {},
     portugal: {}
 };
+const DISTRICT_PREFIX = 'distrito:'; // Region values for districts filled in by distritos.py
 
 function criarIcon(logoUrl) {
     if (typeof L !== 'undefined') {
@@ -141,28 +151,34 @@ function buildCompetitionList() {
     
     allClubs.forEach(club => {
         if (club.filtro && Array.isArray(club.filtro)) {
+            // Clubs with a district are also listed under it, with all their competitions
+            const regions = club.distrito ? [DISTRICT_PREFIX + club.distrito] : [];
+            
             club.filtro.forEach(competition => {
                 availableCompetitions.add(competition);
                 
                 // Parse competition string: e.g., "europa-champions-2025" or "portugal-1liga-2025"
                 const parts = competition.split('-');
                 if (parts.length >= 3) {
-                    const region = parts[0]; // europa, portugal
                     const league = parts[1]; // champions, 1liga, etc.
                     const year = parts[2]; // 2025
                     
-                    if (!competitionStructure[region]) {
-                        competitionStructure[region] = {};
-                    }
-                    if (!competitionStructure[region][league]) {
-                        competitionStructure[region][league] = new Set();
-                    }
-                    competitionStructure[region][league].add(year);
+                    [parts[0], ...regions].forEach(region => { // europa, portugal, distrito:Aveiro
+                        if (!competitionStructure[region]) {
+                            competitionStructure[region] = {};
+                        }
+                        if (!competitionStructure[region][league]) {
+                            competitionStructure[region][league] = new Set();
+                        }
+                        competitionStructure[region][league].add(year);
+                    });
                 }
             });
         }
     });
     
+    updateRegionOptions();
+    
     // Initialize dropdown event handlers
     initializeDropdowns();
 }
@@ -283,6 +299,25 @@ function getLeagueOrder(league) {
     return orderMap[league] || 999; // Unknown leagues go to the end
 }
 
+function updateRegionOptions() {
+    // Add one option per district after "Portugal"
+    const regionMenu = document.getElementById('region-menu');
+    regionMenu.querySelectorAll('.district-option').forEach(option => option.remove());
+    
+    const districts = Object.keys(competitionStructure)
+        .filter(region => region.startsWith(DISTRICT_PREFIX))
+        .map(region => region.slice(DISTRICT_PREFIX.length))
+        .sort((a, b) => a.localeCompare(b, 'pt'));
+    
+    districts.forEach(district => {
+        const option = document.createElement('div');
+        option.className = 'dropdown-option district-option';
+        option.dataset.value = DISTRICT_PREFIX + district;
+        option.textContent = district;
+        regionMenu.appendChild(option);
+    });
+}
+
 function updateLeagueOptions() {
     const leagueMenu = document.getElementById('league-menu');
     const region = currentFilter.region;
@@ -467,18 +502,22 @@ function clearMarkers() {
 }
 
 function shouldShowClub(club) {
-    // Check search filter first
-    const searchTerm = document.getElementById('club-search').value.toLowerCase();
-    if (searchTerm) {
-        const clubName = club.club.toLowerCase();
-        const stadiumName = club.stadium ? club.stadium.toLowerCase() : '';
-        if (!clubName.includes(searchTerm) && !stadiumName.includes(searchTerm)) {
-            return false;
-        }
+    // Check search filter first (matches are computed once per keystroke)
+    if (searchMatches && !searchMatches.has(club.id)) {
+        return false;
+    }
+    
+    // Check district filter (the region dropdown also lists districts)
+    const district = currentFilter.region.startsWith(DISTRICT_PREFIX)
+        ? currentFilter.region.slice(DISTRICT_PREFIX.length)
+        : null;
+    if (district && club.distrito !== district) {
+        return false;
     }
     
     // Check competition filters
-    if (currentFilter.region === 'all' && currentFilter.league === 'all' && currentFilter.year === 'all') {
+    const anyRegion = currentFilter.region === 'all' || district !== null;
+    if (anyRegion && currentFilter.league === 'all' && currentFilter.year === 'all') {
         return true;
     }
     
@@ -495,7 +534,7 @@ function shouldShowClub(club) {
         const league = parts[1];
         const year = parts[2];
         
-        const regionMatch = currentFilter.region === 'all' || currentFilter.region === region;
+        const regionMatch = anyRegion || currentFilter.region === region;
         const leagueMatch = currentFilter.league === 'all' || currentFilter.league === league;
         const yearMatch = currentFilter.year === 'all' || currentFilter.year === year;
         
@@ -503,6 +542,63 @@ function shouldShowClub(club) {
     });
 }
 
+function createNearbyHTML(clubId) {
+    const nearby = nearbyIndex && nearbyIndex.vizinhos[clubId];
+    if (!nearby || nearby.length === 0) {
+        return '';
+    }
+    
+    let nearbyHTML = '<div class="popup-nearby"><div class="popup-nearby-title">Clubes próximos</div><ul>';
+    nearby.forEach(([neighbourId, distanceKm]) => {
+        const neighbour = clubsById.get(neighbourId);
+        if (neighbour) {
+            nearbyHTML += `
+                <li>
+                    <a href="#" onclick="navigateToClubId('${neighbourId}'); return false;">${neighbour.club}</a>
+                    <span class="popup-nearby-distance">${distanceKm.toFixed(1)} km</span>
+                </li>
+            `;
+        }
+    });
+    nearbyHTML += '</ul></div>';
+    
+    return nearbyHTML;
+}
+
+function createPopupHTML(clube) {
+    const detalhes = clubDetails.get(clube.id) || {};
+    const equipmentHTML = hasClubDetails(clube.id)
+        ? createEquipmentHTML(detalhes.equipamentos || clube.equipamentos)
+        : '<div class="popup-loading">A carregar…</div>';
+    const stadiumInfo = clube.stadium ? `<div class="popup-info">Estádio: ${clube.stadium}</div>` : '';
+    const url = detalhes.url || clube.url;
+    const link = url ? `<a href="${url}" target="_blank" class="popup-link">Ver no ZeroZero</a>` : '';
+    
+    return `
+        <div class="popup-content">
+            <div class="popup-title">${clube.club}</div>
+            ${stadiumInfo}
+            ${equipmentHTML}
+            ${createNearbyHTML(clube.id)}
+            <div class="popup-actions">
+                ${link}
+                <button onclick="openEditForm('${clube.id}')" class="edit-button">Sugerir Alteração</button>
+            </div>
+        </div>
+    `;
+}
+
+function loadNearbyIndex() {
+    if (!dataManifest || !dataManifest.ficheiros.vizinhos) return;
+    
+    fetch(DATA_PATH + dataManifest.ficheiros.vizinhos)
+        .then(response => response.json())
+        .then(index => {
+            nearbyIndex = index;
+        })
+        .catch(err => console.warn('Lista de clubes próximos indisponível:', err));
+}
+
 // Load markers for clubs in the current viewport with a buffer
 function loadVisibleMarkers() {
     if (typeof L === 'undefined') {
@@ -540,21 +636,14 @@ function loadVisibleMarkers() {
                     { icon: criarIcon(clube.logo) }
                 ).addTo(map);
 
-                const equipmentHTML = createEquipmentHTML(clube.equipamentos);
-                const stadiumInfo = clube.stadium ? `<div class="popup-info">Estádio: ${clube.stadium}</div>` : '';
-                
-                const popupHTML = `
-                    <div class="popup-content">
-                        <div class="popup-title">${clube.club}</div>
-                        ${stadiumInfo}
-                        ${equipmentHTML}
-                        <div class="popup-actions">
-                            <a href="${clube.url}" target="_blank" class="popup-link">Ver no ZeroZero</a>
-                            <button onclick="openEditForm('${clube.id}')" class="edit-button">Sugerir Alteração</button>
-                        </div>
-                    </div>
-                `;
-                marker.bindPopup(popupHTML);
+                // Built when the popup opens so it can include nearby clubs loaded later
+                marker.bindPopup(() => createPopupHTML(clube));
+                marker.on('popupopen', event => {
+                    if (hasClubDetails(clube.id)) return;
+                    loadClubDetails(clube.id)
+                        .then(() => event.popup.setContent(createPopupHTML(clube)))
+                        .catch(err => console.warn('Detalhes do clube indisponíveis:', err));
+                });
                 
                 // Store the marker
                 activeMarkers.set(clubKey, marker);
@@ -619,6 +708,13 @@ function buildClubsList() {
     });
 }
 
+function navigateToClubId(clubId) {
+    const club = clubsById.get(clubId);
+    if (club) {
+        navigateToClub(club);
+    }
+}
+
 function navigateToClub(club) {
     if (club.latitude && club.longitude && typeof L !== 'undefined') {
         // Pan to club location and zoom in
@@ -637,6 +733,126 @@ function navigateToClub(club) {
     }
 }
 
+// Remove accents and lowercase, same rules as indice_pesquisa.py
+function foldText(text) {
+    return (text || '').normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+}
+
+function tokenizeSearch(text) {
+    const folded = foldText(text);
+    const tokens = folded.match(/[a-z0-9]+/g) || [];
+    const compounds = folded.match(/[a-z0-9]+(?:-[a-z0-9]+)+/g) || [];
+    compounds.forEach(compound => tokens.push(compound.replace(/-/g, '')));
+    return tokens;
+}
+
+// Binary search for the first token >= prefix in the sorted token list
+function lowerBound(tokens, prefix) {
+    let lo = 0;
+    let hi = tokens.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (tokens[mid] < prefix) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+function searchIndexLookup(terms) {
+    let result = null;
+    for (const term of terms) {
+        const found = new Set();
+        for (let i = lowerBound(searchIndex.tokens, term); i < searchIndex.tokens.length && searchIndex.tokens[i].startsWith(term); i++) {
+            searchIndex.postings[i].forEach(position => {
+                if (!result || result.has(searchIndex.ids[position])) {
+                    found.add(searchIndex.ids[position]);
+                }
+            });
+        }
+        result = found;
+        if (result.size === 0) break;
+    }
+    return result;
+}
+
+// Tokens of each club for the fallback search, from the same fields as the index
+function buildFallbackSearchTokens() {
+    fallbackSearchTokens = new Map();
+    allClubs.forEach(club => {
+        const details = clubDetails.get(club.id) || {};
+        const tokens = [];
+        SEARCH_FIELDS.forEach(field => {
+            tokens.push(...tokenizeSearch(field in club ? club[field] : details[field]));
+        });
+        fallbackSearchTokens.set(club.id, tokens);
+    });
+}
+
+function loadAllClubDetails() {
+    const shards = dataManifest.ficheiros.detalhes.map((_, shard) => loadDetailShard(shard));
+    return Promise.all(shards);
+}
+
+function updateSearchMatches(query) {
+    searchQuery = query;
+    const terms = tokenizeSearch(query);
+    if (terms.length === 0) {
+        searchMatches = null;
+        return;
+    }
+    
+    if (searchIndex) {
+        searchMatches = searchIndexLookup(terms);
+        return;
+    }
+    
+    // The summary has no address: fetch the detail shards once and search again
+    if (!hasAllClubDetails() && !allDetailsLoading) {
+        allDetailsLoading = loadAllClubDetails()
+            .then(() => {
+                fallbackSearchTokens = null;
+                if (searchQuery === query) {
+                    updateSearchMatches(query);
+                    applyFilters();
+                }
+            })
+            .catch(err => {
+                console.warn('Detalhes dos clubes indisponíveis para a pesquisa:', err);
+                allDetailsLoading = null;
+            });
+    }
+    
+    // Fallback without index: linear scan with the same prefix matching as the index
+    if (!fallbackSearchTokens) buildFallbackSearchTokens();
+    searchMatches = new Set();
+    allClubs.forEach(club => {
+        const tokens = fallbackSearchTokens.get(club.id);
+        if (terms.every(term => tokens.some(token => token.startsWith(term)))) {
+            searchMatches.add(club.id);
+        }
+    });
+}
+
+function loadSearchIndex() {
+    if (!dataManifest || !dataManifest.ficheiros.indice_pesquisa) return;
+    
+    fetch(DATA_PATH + dataManifest.ficheiros.indice_pesquisa)
+        .then(response => response.json())
+        .then(index => {
+            // Ignore a stale index (built from a different version of the clubs)
+            if (index.versao_dados !== dataManifest.versao) {
+                console.warn('Search index out of date, using linear search');
+                return;
+            }
+            searchIndex = index;
+            console.log(`Search index loaded: ${index.tokens.length} tokens`);
+        })
+        .catch(err => console.warn('Índice de pesquisa indisponível:', err));
+}
+
 function setupSearch() {
     const searchInput = document.getElementById('club-search');
     if (!searchInput) return;
@@ -645,6 +861,7 @@ function setupSearch() {
     searchInput.addEventListener('input', function() {
         clearTimeout(searchTimeout);
         searchTimeout = setTimeout(() => {
+            updateSearchMatches(searchInput.value);
             applyFilters(); // Use applyFilters instead of just buildClubsList
         }, 300); // Debounce search
     });
@@ -670,14 +887,22 @@ function toggleEditForm() {
     }
 }
 
-function openEditForm(clubId, highlightCoordinates = false) {
+async function openEditForm(clubId, highlightCoordinates = false) {
     // Find the club data
-    const club = allClubs.find(c => c.id === clubId);
-    if (!club) {
+    const summary = allClubs.find(c => c.id === clubId);
+    if (!summary) {
         alert('Clube não encontrado');
         return;
     }
     
+    // URL and address live in the detail shards
+    try {
+        await loadClubDetails(clubId);
+    } catch (err) {
+        console.warn('Detalhes do clube indisponíveis:', err);
+    }
+    const club = Object.assign({}, summary, clubDetails.get(clubId));
+    
     // Populate the form with current club data
     document.getElementById('edit-club-name').value = club.club || '';
     document.getElementById('edit-club-stadium').value = club.stadium || '';
@@ -872,11 +1097,180 @@ function downloadSubmissions(submissions) {
     }, 500); // Small delay to ensure download starts first
 }
 
+// Data files are published by build.py under dados/ with content-hashed names;
+// dados/manifest.json (never cached) says which files are current. The last
+// dataset is kept in localStorage so returning visitors only fetch the deltas
+// published since their version. The map only loads the slim summary; the
+// other fields of each club come from detail shards fetched on demand.
+const DATA_PATH = 'dados/';
+const CLUBS_CACHE_KEY = 'scmap-clubes';
+let dataManifest = null;
+let clubDetails = new Map(); // Club ID -> fields not in the summary (equipamentos, address, url...)
+let detailShards = new Map(); // Shard index -> Promise of the loaded shard
+
+// Same FNV-1a 32-bit hash as balde_de() in resumo.py
+function detailShardFor(clubId) {
+    let hash = 0x811c9dc5;
+    for (const byte of new TextEncoder().encode(String(clubId))) {
+        hash = Math.imul(hash ^ byte, 0x01000193) >>> 0;
+    }
+    return hash % dataManifest.ficheiros.detalhes.length;
+}
+
+// Without detail shards (old manifest or clubes.json fallback) the records are already complete
+function hasClubDetails(clubId) {
+    return !dataManifest || !dataManifest.ficheiros.detalhes || clubDetails.has(clubId);
+}
+
+function hasAllClubDetails() {
+    return !dataManifest || !dataManifest.ficheiros.detalhes ||
+        dataManifest.ficheiros.detalhes.every((_, shard) => detailShards.has(shard));
+}
+
+function loadClubDetails(clubId) {
+    if (hasClubDetails(clubId)) return Promise.resolve();
+    return loadDetailShard(detailShardFor(clubId));
+}
+
+function loadDetailShard(shard) {
+    if (!detailShards.has(shard)) {
+        const promise = fetch(DATA_PATH + dataManifest.ficheiros.detalhes[shard])
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .then(details => {
+                Object.entries(details).forEach(([id, fields]) => clubDetails.set(id, fields));
+            })
+            .catch(err => {
+                detailShards.delete(shard); // Allow a retry on the next popup
+                throw err;
+            });
+        detailShards.set(shard, promise);
+    }
+    return detailShards.get(shard);
+}
+
+// Expands the columnar summary from resumo.py into club objects
+function expandSummary(summary) {
+    return summary.clubes.map(row => {
+        const club = {};
+        summary.campos.forEach((field, i) => {
+            club[field] = field === 'filtro' && row[i]
+                ? row[i].map(index => summary.competicoes[index])
+                : row[i];
+        });
+        return club;
+    });
+}
+
+// Keeps only the summary fields of a full record (deltas carry full records)
+function projectSummary(club) {
+    if (!dataManifest || !dataManifest.campos_resumo) return club;
+    const summary = {};
+    dataManifest.campos_resumo.forEach(field => {
+        if (field in club) summary[field] = club[field];
+    });
+    return summary;
+}
+
+function readClubsCache() {
+    try {
+        return JSON.parse(localStorage.getItem(CLUBS_CACHE_KEY));
+    } catch (err) {
+        return null;
+    }
+}
+
+function writeClubsCache(hash, clubs) {
+    try {
+        localStorage.setItem(CLUBS_CACHE_KEY, JSON.stringify({ hash, clubs }));
+    } catch (err) {
+        console.warn('Não foi possível guardar os clubes em cache:', err);
+    }
+}
+
+// List of delta files from the cached version to the latest, or null if the chain is broken
+function findDeltaChain(manifest, cachedHash) {
+    const start = manifest.deltas.findIndex(delta => delta.anterior === cachedHash);
+    if (start === -1) return null;
+    
+    const chain = manifest.deltas.slice(start);
+    for (let i = 1; i < chain.length; i++) {
+        if (chain[i].anterior !== chain[i - 1].hash) return null;
+    }
+    if (chain[chain.length - 1].hash !== manifest.versao) return null;
+    return chain.map(delta => delta.ficheiro);
+}
+
+function applyDelta(clubs, delta) {
+    const byId = new Map(clubs.map(club => [club.id, club]));
+    delta.removidos.forEach(id => byId.delete(id));
+    delta.alterados.concat(delta.adicionados).forEach(club => byId.set(club.id, projectSummary(club)));
+    return Array.from(byId.values());
+}
+
+async function fetchJSON(url, options) {
+    const response = await fetch(url, options);
+    if (!response.ok) throw new Error(`HTTP ${response.status} (${url})`);
+    return response.json();
+}
+
+function loadFullClubs() {
+    // Without the generated data every club is complete (no detail shards to fetch)
+    dataManifest = null;
+    return fetchJSON('clubes.json');
+}
+
+async function loadClubs() {
+    try {
+        dataManifest = await fetchJSON(DATA_PATH + 'manifest.json', { cache: 'no-cache' });
+    } catch (err) {
+        console.warn('Manifesto de dados indisponível, a carregar clubes.json:', err);
+        return loadFullClubs();
+    }
+    
+    const cached = readClubsCache();
+    if (cached && cached.hash === dataManifest.versao) {
+        console.log(`Clubs loaded from cache (version ${dataManifest.versao.slice(0, 12)})`);
+        return cached.clubs;
+    }
+    
+    const chain = cached ? findDeltaChain(dataManifest, cached.hash) : null;
+    if (chain) {
+        try {
+            let clubs = cached.clubs;
+            for (const deltaFile of chain) {
+                clubs = applyDelta(clubs, await fetchJSON(DATA_PATH + deltaFile));
+            }
+            console.log(`Clubs updated with ${chain.length} delta(s)`);
+            writeClubsCache(dataManifest.versao, clubs);
+            return clubs;
+        } catch (err) {
+            console.warn('Erro ao aplicar deltas, a carregar versão completa:', err);
+        }
+    }
+    
+    let clubs;
+    try {
+        if (dataManifest.ficheiros.resumo) {
+            clubs = expandSummary(await fetchJSON(DATA_PATH + dataManifest.ficheiros.resumo));
+        } else {
+            clubs = await fetchJSON(DATA_PATH + dataManifest.ficheiros.clubes);
+        }
+    } catch (err) {
+        console.warn('Dados gerados indisponíveis, a carregar clubes.json:', err);
+        return loadFullClubs();
+    }
+    writeClubsCache(dataManifest.versao, clubs);
+    return clubs;
+}
+
 // Load club data and initialize lazy loading
-fetch('clubes.json')
-    .then(response => response.json())
+loadClubs()
     .then(data => {
         allClubs = data;
+        clubsById = new Map(allClubs.map(club => [club.id, club]));
         console.log(`Loaded ${allClubs.length} clubs. Implementing lazy loading for better performance.`);
         
         // Build competition filter list
@@ -887,6 +1281,8 @@ fetch('clubes.json')
         
         // Setup search functionality
         setupSearch();
+        loadSearchIndex();
+        loadNearbyIndex();
         
         // Initial load of visible markers
         loadVisibleMarkers();
@@ -0,0 +1,303 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def criar_amostrador_latencia(especificacao):
+    """
+    Cria uma função que devolve latências em segundos a partir de uma especificação:
+    "nenhuma", "fixa:MS", "uniforme:MIN_MS:MAX_MS" ou "lognormal:MEDIANA_MS:SIGMA"
+    """
+    partes = (especificacao or "nenhuma").split(":")
+    tipo = partes[0]
+    try:
+        valores = [float(p) for p in partes[1:]]
+        if tipo == "nenhuma":
+            return lambda: 0.0
+        if tipo == "fixa":
+            return lambda: valores[0] / 1000
+        if tipo == "uniforme":
+            return lambda: random.uniform(valores[0], valores[1]) / 1000
+        if tipo == "lognormal":
+            mu = math.log(valores[0])
+            return lambda: random.lognormvariate(mu, valores[1]) / 1000
+    except (IndexError, ValueError):
+        pass
+    raise ValueError(f"Especificação de latência inválida: {especificacao}")
+
+def _numero(texto, modulo, desvio=0):
+    """
+    Número determinístico a partir de um texto (as páginas geradas são estáveis)
+    """
+    return int(hashlib.md5(texto.encode("utf-8")).hexdigest()[:8], 16) % modulo + desvio
+
+class Simulador:
+    """
+    Substituto local do zerozero.pt e do Nominatim para testes de carga do scraper.
+
+    Serve páginas gravadas (ficheiros HTML em `pasta_gravacoes`, com o mesmo
+    caminho do URL) ou, na falta delas, páginas geradas com a estrutura usada
+    pelo scraper. Injeta latência, erros 5xx e respostas 429 com Retry-After.
+    """
+
+    def __init__(self, clubes_por_competicao=20, latencia="nenhuma", latencia_nominatim="nenhuma",
+                 taxa_erro=0.0, taxa_429=0.0, retry_after=1, limite_pedidos=0.0,
+                 pasta_gravacoes=None, semente=None):
+        self.clubes_por_competicao = clubes_por_competicao
+        self.latencia = criar_amostrador_latencia(latencia)
+        self.latencia_nominatim = criar_amostrador_latencia(latencia_nominatim)
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.limite_pedidos = limite_pedidos
+        self.pasta_gravacoes = pasta_gravacoes
+        self.aleatorio = random.Random(semente)
+
+        self._lock = threading.Lock()
+        self._fichas = limite_pedidos
+        self._ultimo_reabastecimento = time.monotonic()
+        self.servidor = None
+        self.reiniciar_estatisticas()
+
+    def reiniciar_estatisticas(self):
+        with self._lock:
+            self.pedidos_por_caminho = Counter()
+            self.estados = Counter()
+            self.pedidos_por_tipo = Counter()
+
+    def estatisticas(self):
+        with self._lock:
+            pedidos = sum(self.pedidos_por_caminho.values())
+            return {
+                "pedidos": pedidos,
+                "caminhos_unicos": len(self.pedidos_por_caminho),
+                "repeticoes": pedidos - len(self.pedidos_por_caminho),
+                "estados": {str(k): v for k, v in sorted(self.estados.items())},
+                "por_tipo": dict(self.pedidos_por_tipo),
+            }
+
+    def _excede_limite(self):
+        """
+        Token bucket global: devolve True se o pedido ultrapassa o limite por segundo
+        """
+        if self.limite_pedidos <= 0:
+            return False
+        agora = time.monotonic()
+        self._fichas = min(self.limite_pedidos,
+                           self._fichas + (agora - self._ultimo_reabastecimento) * self.limite_pedidos)
+        self._ultimo_reabastecimento = agora
+        if self._fichas >= 1:
+            self._fichas -= 1
+            return False
+        return True
+
+    def _decidir_falha(self, caminho, tipo):
+        """
+        Decide se o pedido deve falhar e regista-o nas estatísticas
+        """
+        with self._lock:
+            self.pedidos_por_caminho[caminho] += 1
+            self.pedidos_por_tipo[tipo] += 1
+            if self._excede_limite() or self.aleatorio.random() < self.taxa_429:
+                return 429
+            if self.aleatorio.random() < self.taxa_erro:
+                return self.aleatorio.choice((500, 502, 503))
+            return None
+
+    def _registar_estado(self, estado):
+        with self._lock:
+            self.estados[estado] += 1
+
+    def _gravacao(self, caminho):
+        if not self.pasta_gravacoes:
+            return None
+        base = os.path.abspath(self.pasta_gravacoes)
+        ficheiro = os.path.abspath(os.path.join(base, caminho.strip("/") + ".html"))
+        if not ficheiro.startswith(base + os.sep):
+            return None
+        if os.path.exists(ficheiro):
+            with open(ficheiro, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def pagina_competicao(self, caminho):
+        linhas = []
+        for i in range(self.clubes_por_competicao):
+            clube_id = _numero(f"{caminho}#{i}", 900000, 1000)
+            nome = f"Clube {clube_id}"
+            linhas.append(f'<tr><td>{i + 1}</td><td><a href="/equipa/clube-{clube_id}/{clube_id}">{nome}</a></td></tr>')
+        # Ligações para outras competições/edições e para a associação (usadas pelo crawler)
+        ligacoes = [f'<a href="/associacao/af-simulada-{_numero(caminho, 5)}">Associação</a>']
+        for j in range(3):
+            n = _numero(f"{caminho}@{j}", 40)
+            ligacoes.append(f'<a href="/competicao/simulada-{n}">Competição {n}</a>')
+            ligacoes.append(f'<a href="/edicao/simulada-{n}-2025-26/{200000 + n}">Edição {n}</a>')
+        return (f"<html><head><title>Competição - ZeroZero.pt</title></head><body>"
+                f"<h1>Competição</h1><table class=\"classification\">{''.join(linhas)}</table>"
+                f"<div class=\"related\">{''.join(ligacoes)}</div></body></html>")
+
+    def pagina_clube(self, caminho):
+        clube_id = caminho.rstrip("/").split("/")[-1]
+        nome = f"Clube {clube_id}"
+        localidade = f"Localidade {_numero(clube_id, 300)}"
+        return f"""<html><head><title>{nome} - ZeroZero.pt</title></head><body>
+<h1>{nome}</h1>
+<img src="/img/logos/equipas/{clube_id}_imgbank.png" alt="emblema {nome}">
+<img src="/img/logos/equipas/{clube_id}_shirt_casa.png" alt="equipamento casa">
+<img src="/img/logos/equipas/{clube_id}_shirt_fora.png" alt="equipamento fora">
+<table>
+<tr><td>Estádio</td><td><a href="/estadio/estadio-{clube_id}/{clube_id}">Estádio Municipal de {localidade}</a></td></tr>
+<tr><td>Morada</td><td>Rua do Clube {clube_id}, {localidade}</td></tr>
+</table></body></html>"""
+
+    def resposta_nominatim(self, consulta):
+        # Coordenadas determinísticas dentro de Portugal continental
+        lat = 37.0 + _numero(consulta, 500000) / 100000
+        lon = -9.0 + _numero(consulta[::-1], 250000) / 100000
+        return [{
+            "place_id": _numero(consulta, 10 ** 8),
+            "lat": f"{lat:.6f}",
+            "lon": f"{lon:.6f}",
+            "display_name": consulta,
+            "class": "leisure",
+            "type": "stadium",
+            "importance": 0.5,
+        }]
+
+    def criar_handler(self):
+        simulador = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, formato, *args):
+                pass
+
+            def _responder(self, estado, corpo, tipo_conteudo="text/html; charset=utf-8", cabecalhos=None):
+                dados = corpo.encode("utf-8")
+                self.send_response(estado)
+                self.send_header("Content-Type", tipo_conteudo)
+                self.send_header("Content-Length", str(len(dados)))
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+                if not self.path.startswith("/__"):
+                    simulador._registar_estado(estado)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                caminho = url.path
+
+                if caminho == "/__stats":
+                    return self._responder(200, json.dumps(simulador.estatisticas()), "application/json")
+                if caminho == "/__reset":
+                    simulador.reiniciar_estatisticas()
+                    return self._responder(200, "{}", "application/json")
+
+                if caminho.startswith("/search"):
+                    tipo, amostrador = "nominatim", simulador.latencia_nominatim
+                elif caminho.startswith("/equipa/"):
+                    tipo, amostrador = "clube", simulador.latencia
+                elif caminho.startswith(("/competicao/", "/edicao/", "/associacao/")):
+                    tipo, amostrador = "competicao", simulador.latencia
+                else:
+                    return self._responder(404, "não encontrado")
+
+                time.sleep(amostrador())
+                falha = simulador._decidir_falha(self.path, tipo)
+                if falha == 429:
+                    return self._responder(429, "too many requests",
+                                           cabecalhos={"Retry-After": str(simulador.retry_after)})
+                if falha:
+                    return self._responder(falha, "erro simulado")
+
+                if tipo == "nominatim":
+                    consulta = parse_qs(url.query).get("q", [""])[0]
+                    return self._responder(200, json.dumps(simulador.resposta_nominatim(consulta)),
+                                           "application/json")
+
+                html = simulador._gravacao(caminho)
+                if html is None:
+                    html = simulador.pagina_clube(caminho) if tipo == "clube" else simulador.pagina_competicao(caminho)
+                return self._responder(200, html)
+
+        return Handler
+
+    def iniciar(self, host="127.0.0.1", porta=0):
+        """
+        Inicia o servidor numa thread e devolve o URL base
+        """
+        self.servidor = ThreadingHTTPServer((host, porta), self.criar_handler())
+        self.servidor.daemon_threads = True
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+def adicionar_argumentos(parser):
+    """
+    Argumentos de configuração do simulador (partilhados com teste_carga.py)
+    """
+    parser.add_argument("--clubes-por-competicao", type=int, default=20)
+    parser.add_argument("--latencia", default="lognormal:80:0.5",
+                        help='latência das páginas: "nenhuma", "fixa:MS", "uniforme:MIN:MAX" ou "lognormal:MEDIANA:SIGMA"')
+    parser.add_argument("--latencia-nominatim", default="fixa:30", help="latência do Nominatim (mesmo formato)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 5xx")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="fração de respostas 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="valor do cabeçalho Retry-After (s)")
+    parser.add_argument("--limite-pedidos", type=float, default=0.0,
+                        help="pedidos por segundo antes de responder 429 (0 = sem limite)")
+    parser.add_argument("--gravacoes", help="pasta com páginas HTML gravadas (caminho do URL + .html)")
+    parser.add_argument("--semente", type=int, help="semente para a injeção de erros")
+
+def criar_simulador(args):
+    return Simulador(
+        clubes_por_competicao=args.clubes_por_competicao,
+        latencia=args.latencia,
+        latencia_nominatim=args.latencia_nominatim,
+        taxa_erro=args.taxa_erro,
+        taxa_429=args.taxa_429,
+        retry_after=args.retry_after,
+        limite_pedidos=args.limite_pedidos,
+        pasta_gravacoes=args.gravacoes,
+        semente=args.semente,
+    )
+
+def main():
+    """Corre o simulador em primeiro plano"""
+    parser = argparse.ArgumentParser(description="Servidor local que simula o zerozero.pt e o Nominatim")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    simulador = criar_simulador(args)
+    url = simulador.iniciar(args.host, args.porta)
+    logger.info(f"🧪 Simulador a correr em {url} (estatísticas em {url}/__stats)")
+    logger.info(f"💡 ZEROZERO_BASE_URL={url} NOMINATIM_DOMAIN={args.host}:{args.porta} NOMINATIM_SCHEME=http")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("⏹ Simulador parado")
+        simulador.parar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+import crawler
+import fila_trabalho
+import scraper
+from crawler import Crawler
+from fila_trabalho import FilaTrabalho
+from simulador_zerozero import adicionar_argumentos, criar_simulador
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) por interpolação linear
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+def resumo_latencias(duracoes):
+    return {
+        "p50_ms": round(percentil(duracoes, 50) * 1000, 1) if duracoes else None,
+        "p95_ms": round(percentil(duracoes, 95) * 1000, 1) if duracoes else None,
+        "p99_ms": round(percentil(duracoes, 99) * 1000, 1) if duracoes else None,
+        "max_ms": round(max(duracoes) * 1000, 1) if duracoes else None,
+    }
+
+def configurar_scraper(base_url, args):
+    """
+    Aponta o scraper para o simulador e aplica as definições de retry a testar
+    """
+    scraper.BASE_URL = base_url
+    scraper.NOMINATIM_DOMAIN = urlparse(base_url).netloc
+    scraper.NOMINATIM_SCHEME = "http"
+    scraper.NOMINATIM_DELAY = args.nominatim_delay
+    scraper.TIMEOUT = args.timeout
+    scraper.MAX_TENTATIVAS = args.max_tentativas
+    scraper.DELAY_TENTATIVA = args.delay_tentativa
+    scraper.MAX_RETRY_AFTER = args.max_retry_after
+
+@contextmanager
+def _cronometrar(nome, duracoes):
+    """
+    Substitui temporariamente scraper.<nome> por uma versão que regista a
+    duração de cada chamada (incluindo as tentativas repetidas)
+    """
+    original = getattr(scraper, nome)
+
+    def cronometrada(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            duracoes.append(time.perf_counter() - inicio)
+
+    setattr(scraper, nome, cronometrada)
+    try:
+        yield
+    finally:
+        setattr(scraper, nome, original)
+
+def _trabalhador(caminho_fila, args, indice):
+    """
+    Um trabalhador do fila_trabalho.py (shard `indice` de `args.trabalhadores`),
+    com a sua própria ligação à fila, como um processo separado teria
+    """
+    fila = FilaTrabalho(caminho_fila, args.timeout_visibilidade, args.max_tentativas_fila,
+                        args.clubes_por_segundo, backoff=args.backoff_fila)
+    try:
+        fila_trabalho.trabalhar(fila, f"carga-{indice}", indice, args.trabalhadores, pausa_vazia=args.pausa_vazia)
+    finally:
+        fila.fechar()
+
+def executar_teste(base_url, args, pasta):
+    """
+    Corre o pipeline real contra o simulador: descoberta com o crawler.Crawler
+    e scraping com trabalhadores do fila_trabalho.py (orçamento partilhado).
+    Devolve o relatório.
+    """
+    configurar_scraper(base_url, args)
+    requests.get(f"{base_url}/__reset", timeout=5)
+
+    sementes = [f"{base_url}/competicao/simulada-{i}" for i in range(args.competicoes)]
+    inicio = time.perf_counter()
+
+    # 1. Descoberta (crawler explorar)
+    duracoes_paginas = []
+    crawler = Crawler(os.path.join(pasta, "crawler.sqlite"), args.max_profundidade, args.delay_crawler)
+    try:
+        crawler.adicionar_sementes(sementes)
+        with _cronometrar("fazer_requisicao", duracoes_paginas):
+            paginas_visitadas = crawler.executar(args.max_paginas)
+        clubes = [(clube_id, url) for clube_id, _, url in crawler.clubes()]
+    finally:
+        crawler.fechar()
+    fim_descoberta = time.perf_counter()
+
+    # 2. Scraping dos clubes (fila_trabalho popular + trabalhar; inclui geocodificação)
+    caminho_fila = os.path.join(pasta, "fila.sqlite")
+    fila = FilaTrabalho(caminho_fila, args.timeout_visibilidade, args.max_tentativas_fila,
+                        args.clubes_por_segundo, backoff=args.backoff_fila)
+    duracoes_clubes = []
+    try:
+        fila.adicionar(clubes)
+        with _cronometrar("obter_dados_clube", duracoes_clubes):
+            trabalhadores = [threading.Thread(target=_trabalhador, args=(caminho_fila, args, i))
+                             for i in range(args.trabalhadores)]
+            for t in trabalhadores:
+                t.start()
+            for t in trabalhadores:
+                t.join()
+        fim = time.perf_counter()
+        contagens = fila.contagens()
+        com_coordenadas = sum(1 for dados in fila.resultados() if dados.get("latitude") is not None)
+    finally:
+        fila.fechar()
+
+    estatisticas = requests.get(f"{base_url}/__stats", timeout=5).json()
+    concluidos = contagens.get("concluido", 0)
+
+    return {
+        "configuracao": {
+            "trabalhadores": args.trabalhadores,
+            "clubes_por_segundo": args.clubes_por_segundo,
+            "competicoes": args.competicoes,
+            "max_paginas": args.max_paginas,
+            "max_profundidade": args.max_profundidade,
+            "delay_crawler": args.delay_crawler,
+            "clubes_por_competicao": args.clubes_por_competicao,
+            "latencia": args.latencia,
+            "taxa_erro": args.taxa_erro,
+            "taxa_429": args.taxa_429,
+            "retry_after": args.retry_after,
+            "limite_pedidos": args.limite_pedidos,
+            "max_tentativas": args.max_tentativas,
+            "delay_tentativa": args.delay_tentativa,
+            "max_tentativas_fila": args.max_tentativas_fila,
+            "backoff_fila": args.backoff_fila,
+        },
+        "descoberta": {
+            "duracao_s": round(fim_descoberta - inicio, 2),
+            "paginas_visitadas": paginas_visitadas,
+            "clubes_descobertos": len(clubes),
+            "latencia_pagina": resumo_latencias(duracoes_paginas),
+        },
+        "scraping": {
+            "duracao_s": round(fim - fim_descoberta, 2),
+            "clubes_por_segundo": round(concluidos / (fim - fim_descoberta), 2) if fim > fim_descoberta else 0,
+            "sucessos": concluidos,
+            "falhas": contagens.get("falhado", 0),
+            "tentativas": len(duracoes_clubes),
+            "com_coordenadas": com_coordenadas,
+            "latencia_clube": resumo_latencias(duracoes_clubes),
+        },
+        "servidor": estatisticas,
+        "duracao_total_s": round(fim - inicio, 2),
+    }
+
+def main():
+    """Teste de carga do scraper contra o simulador local do zerozero.pt"""
+    parser = argparse.ArgumentParser(description="Teste de carga offline do scraper (crawler + fila de trabalho)")
+    parser.add_argument("--servidor", help="URL de um simulador já a correr (por omissão inicia um local)")
+    parser.add_argument("--competicoes", type=int, default=5, help="nº de competições-semente do crawler")
+    parser.add_argument("--max-paginas", type=int, default=20, help="orçamento de páginas do crawler")
+    parser.add_argument("--max-profundidade", type=int, default=1)
+    parser.add_argument("--delay-crawler", type=float, default=0.0,
+                        help="intervalo mínimo entre pedidos do crawler (s)")
+    parser.add_argument("--trabalhadores", type=int, default=4, help="nº de trabalhadores da fila (um shard cada)")
+    parser.add_argument("--clubes-por-segundo", type=float, default=0.0,
+                        help="orçamento global da fila (0 = sem limite)")
+    parser.add_argument("--timeout-visibilidade", type=float, default=300)
+    parser.add_argument("--max-tentativas-fila", type=int, default=3, help="tentativas por clube na fila")
+    parser.add_argument("--backoff-fila", type=float, default=1.0, help="espera base antes de repetir um clube (s)")
+    parser.add_argument("--pausa-vazia", type=float, default=0.5,
+                        help="espera de um trabalhador sem itens disponíveis (s)")
+    parser.add_argument("--max-tentativas", type=int, default=scraper.MAX_TENTATIVAS)
+    parser.add_argument("--delay-tentativa", type=float, default=0.2, help="espera base entre tentativas (s)")
+    parser.add_argument("--max-retry-after", type=float, default=scraper.MAX_RETRY_AFTER)
+    parser.add_argument("--timeout", type=float, default=scraper.TIMEOUT)
+    parser.add_argument("--nominatim-delay", type=float, default=0.0, help="pausa após cada geocodificação (s)")
+    parser.add_argument("--saida", help="escreve o relatório JSON neste ficheiro")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    # O scraper, o crawler e a fila registam cada clube/página; durante o teste só interessam avisos e erros
+    for modulo in (scraper, crawler, fila_trabalho):
+        logging.getLogger(modulo.__name__).setLevel(logging.WARNING)
+
+    simulador = None
+    base_url = args.servidor
+    if not base_url:
+        simulador = criar_simulador(args)
+        base_url = simulador.iniciar()
+        logger.info(f"🧪 Simulador iniciado em {base_url}")
+
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            relatorio = executar_teste(base_url.rstrip("/"), args, pasta)
+    finally:
+        if simulador:
+            simulador.parar()
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        logger.info(f"📄 Relatório escrito em {args.saida}")
+    else:
+        print(texto)
+
+    scraping = relatorio["scraping"]
+    logger.info(f"📊 {scraping['sucessos']}/{scraping['sucessos'] + scraping['falhas']} clubes, "
+                f"{scraping['clubes_por_segundo']} clubes/s, p95 {scraping['latencia_clube']['p95_ms']} ms, "
+                f"{relatorio['servidor']['repeticoes']} repetições de pedidos")
+
+if __name__ == "__main__":
+    main()
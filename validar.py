@@ -0,0 +1,359 @@
+import argparse
+import json
+import logging
+import re
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Caixas (lat_min, lat_max, lon_min, lon_max) com uma pequena margem para a costa
+CAIXAS_PORTUGAL = {
+    "continente": (36.8, 42.2, -9.6, -6.1),
+    "madeira": (32.3, 33.2, -17.4, -16.2),
+    "acores": (36.8, 39.8, -31.4, -24.9),
+}
+
+CAMPOS_OBRIGATORIOS = {
+    "id": (str,),
+    "club": (str,),
+    "stadium": (str, type(None)),
+    "logo": (str, type(None)),
+    "equipamentos": (list,),
+    "address": (str, type(None)),
+    "latitude": (int, float, type(None)),
+    "longitude": (int, float, type(None)),
+    "url": (str,),
+}
+
+CAMPOS_OPCIONAIS = {
+    "filtro": (list,),
+    "distrito": (str, type(None)),
+    "concelho": (str, type(None)),
+    # Campos corrigidos à mão, que o scraper não volta a alterar
+    "campos_manuais": (list,),
+}
+
+TIPOS_EQUIPAMENTO = {"casa", "fora", "alternativo", "desconhecido"}
+
+# Formato "pais-competicao-ano", ex: portugal-1liga-2025
+PADRAO_FILTRO = re.compile(r'^[a-z]+-[a-z0-9à-ÿ]+-\d{4}$')
+
+RAIO_TERRA_M = 6371008.8
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Distância em metros entre pares de pontos (aceita arrays NumPy)
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RAIO_TERRA_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def _para_float(valor):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return np.nan
+    return float(valor)
+
+def carregar_colunas(dados_clubes):
+    """
+    Converte a lista de clubes numa estrutura colunar (arrays NumPy)
+    """
+    n = len(dados_clubes)
+    ids = np.empty(n, dtype=object)
+    urls = np.empty(n, dtype=object)
+    latitude = np.empty(n, dtype=np.float64)
+    longitude = np.empty(n, dtype=np.float64)
+
+    for i, clube in enumerate(dados_clubes):
+        if not isinstance(clube, dict):
+            clube = {}
+        ids[i] = str(clube.get("id") or "")
+        urls[i] = str(clube.get("url") or "")
+        latitude[i] = _para_float(clube.get("latitude"))
+        longitude[i] = _para_float(clube.get("longitude"))
+
+    return {
+        "id": ids,
+        "url": urls,
+        "latitude": latitude,
+        "longitude": longitude,
+    }
+
+def verificar_esquema(dados_clubes):
+    """
+    Verifica campos obrigatórios, tipos e equipamentos de cada clube
+    """
+    problemas_esquema = []
+    tipos_invalidos = []
+    equipamentos_desconhecidos = []
+    conhecidos = set(CAMPOS_OBRIGATORIOS) | set(CAMPOS_OPCIONAIS)
+
+    for i, clube in enumerate(dados_clubes):
+        if not isinstance(clube, dict):
+            problemas_esquema.append({"indice": i, "id": None, "problemas": ["registo não é um objeto"]})
+            continue
+
+        problemas = []
+        for campo, tipos in CAMPOS_OBRIGATORIOS.items():
+            if campo not in clube:
+                problemas.append(f"campo em falta: {campo}")
+            elif isinstance(clube[campo], bool) or not isinstance(clube[campo], tipos):
+                problemas.append(f"tipo inválido em {campo}: {type(clube[campo]).__name__}")
+
+        for campo, tipos in CAMPOS_OPCIONAIS.items():
+            if campo in clube and not isinstance(clube[campo], tipos):
+                problemas.append(f"tipo inválido em {campo}: {type(clube[campo]).__name__}")
+
+        for campo in clube:
+            if campo not in conhecidos:
+                problemas.append(f"campo desconhecido: {campo}")
+        for campo in clube.get("campos_manuais") or []:
+            if campo not in conhecidos:
+                problemas.append(f"campo desconhecido em campos_manuais: {campo}")
+
+        if isinstance(clube.get("club"), str) and not clube["club"].strip():
+            problemas.append("nome do clube vazio")
+
+        equipamentos = clube.get("equipamentos")
+        if isinstance(equipamentos, list):
+            desconhecidos = 0
+            for equipamento in equipamentos:
+                if not isinstance(equipamento, dict) or not equipamento.get("url"):
+                    problemas.append("equipamento sem url")
+                    continue
+                tipo = equipamento.get("type")
+                if tipo == "desconhecido":
+                    desconhecidos += 1
+                elif tipo not in TIPOS_EQUIPAMENTO:
+                    tipos_invalidos.append({"id": clube.get("id"), "type": tipo})
+            if desconhecidos:
+                equipamentos_desconhecidos.append(clube.get("id"))
+
+        if problemas:
+            problemas_esquema.append({"indice": i, "id": clube.get("id"), "problemas": problemas})
+
+    return problemas_esquema, tipos_invalidos, equipamentos_desconhecidos
+
+def verificar_filtros(dados_clubes):
+    """
+    Verifica se as chaves de filtro seguem o formato "pais-competicao-ano"
+    """
+    invalidos = []
+    for clube in dados_clubes:
+        if not isinstance(clube, dict) or not isinstance(clube.get("filtro"), list):
+            continue
+        maus = [f for f in clube["filtro"] if not isinstance(f, str) or not PADRAO_FILTRO.match(f)]
+        if maus:
+            invalidos.append({"id": clube.get("id"), "filtro": maus})
+    return invalidos
+
+def _duplicados(valores, ids):
+    """
+    Agrupa os índices de valores repetidos (ignora valores vazios)
+    """
+    valores = valores.astype(str)
+    unicos, inverso, contagens = np.unique(valores, return_inverse=True, return_counts=True)
+    repetidos = np.flatnonzero((contagens > 1) & (unicos != ""))
+    if repetidos.size == 0:
+        return []
+
+    ordem = np.argsort(inverso, kind="stable")
+    inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))
+    grupos = []
+    for g in repetidos:
+        indices = ordem[inicios[g]:inicios[g] + contagens[g]]
+        grupos.append({
+            "valor": str(unicos[g]),
+            "indices": indices.tolist(),
+            "ids": ids[indices].tolist(),
+        })
+    return grupos
+
+def verificar_caixas(colunas):
+    """
+    Devolve a máscara de clubes com coordenadas fora de Portugal
+    """
+    lat, lon = colunas["latitude"], colunas["longitude"]
+    dentro = np.zeros(lat.shape, dtype=bool)
+    for lat_min, lat_max, lon_min, lon_max in CAIXAS_PORTUGAL.values():
+        dentro |= (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    com_coordenadas = ~(np.isnan(lat) | np.isnan(lon))
+    return com_coordenadas & ~dentro
+
+def _pares_proximos(lat, lon, raio_m):
+    """
+    Encontra pares de pontos a menos de raio_m metros usando uma grelha.
+    Cada ponto só é comparado com as células vizinhas, evitando O(n²).
+    """
+    n = lat.size
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    celula = raio_m / 111320.0
+    x = lon * np.cos(np.radians(lat))
+    ci = np.floor(lat / celula).astype(np.int64)
+    cj = np.floor(x / celula).astype(np.int64)
+    chave = (ci << 32) + cj
+
+    ordem = np.argsort(chave, kind="stable")
+    chaves_ordenadas = chave[ordem]
+    origem = np.arange(n)
+
+    todos_i, todos_j = [], []
+    # Metade das vizinhanças basta: cada par é visto uma única vez
+    for di, dj in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        alvo = chave + (di << 32) + dj
+        inicio = np.searchsorted(chaves_ordenadas, alvo, side="left")
+        fim = np.searchsorted(chaves_ordenadas, alvo, side="right")
+        contagens = fim - inicio
+        total = int(contagens.sum())
+        if total == 0:
+            continue
+        desvio = np.repeat(inicio - (np.cumsum(contagens) - contagens), contagens)
+        j = ordem[np.arange(total) + desvio]
+        i = np.repeat(origem, contagens)
+        if di == 0 and dj == 0:
+            manter = j > i
+            i, j = i[manter], j[manter]
+        todos_i.append(i)
+        todos_j.append(j)
+
+    if not todos_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    i = np.concatenate(todos_i)
+    j = np.concatenate(todos_j)
+    distancias = haversine_m(lat[i], lon[i], lat[j], lon[j])
+    perto = distancias < raio_m
+    return i[perto], j[perto], distancias[perto]
+
+def verificar_coordenadas(colunas, min_partilhados=2, distancia_minima_m=50.0):
+    """
+    Procura coordenadas idênticas partilhadas por vários clubes (fallbacks do
+    geocoder) e clubes distintos demasiado próximos entre si
+    """
+    lat, lon = colunas["latitude"], colunas["longitude"]
+    ids = colunas["id"]
+    validos = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    if validos.size == 0:
+        return [], []
+
+    pontos = np.round(np.column_stack((lat[validos], lon[validos])), 6)
+    unicos, inverso, contagens = np.unique(pontos, axis=0, return_inverse=True, return_counts=True)
+    inverso = inverso.ravel()
+
+    ordem = np.argsort(inverso, kind="stable")
+    inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))
+
+    def ids_do_ponto(g):
+        return ids[validos[ordem[inicios[g]:inicios[g] + contagens[g]]]].tolist()
+
+    partilhadas = []
+    for g in np.flatnonzero(contagens >= min_partilhados):
+        partilhadas.append({
+            "latitude": float(unicos[g, 0]),
+            "longitude": float(unicos[g, 1]),
+            "total": int(contagens[g]),
+            "ids": ids_do_ponto(g),
+        })
+    partilhadas.sort(key=lambda grupo: grupo["total"], reverse=True)
+
+    proximos = []
+    if distancia_minima_m > 0:
+        i, j, distancias = _pares_proximos(unicos[:, 0], unicos[:, 1], distancia_minima_m)
+        for a, b, d in zip(i.tolist(), j.tolist(), distancias.tolist()):
+            proximos.append({
+                "ids": [ids_do_ponto(a), ids_do_ponto(b)],
+                "distancia_m": round(d, 1),
+            })
+        proximos.sort(key=lambda par: par["distancia_m"])
+
+    return partilhadas, proximos
+
+def validar(dados_clubes, min_partilhados=2, distancia_minima_m=50.0):
+    """
+    Executa todas as verificações e devolve o relatório
+    """
+    if not isinstance(dados_clubes, list):
+        raise ValueError("O ficheiro de clubes deve conter uma lista JSON")
+
+    colunas = carregar_colunas(dados_clubes)
+    ids = colunas["id"]
+
+    problemas_esquema, tipos_invalidos, equipamentos_desconhecidos = verificar_esquema(dados_clubes)
+
+    sem_coordenadas = np.isnan(colunas["latitude"]) | np.isnan(colunas["longitude"])
+    fora = verificar_caixas(colunas)
+    partilhadas, proximos = verificar_coordenadas(colunas, min_partilhados, distancia_minima_m)
+
+    erros = {
+        "esquema": problemas_esquema,
+        "ids_duplicados": _duplicados(ids, ids),
+        "urls_duplicadas": _duplicados(colunas["url"], ids),
+        "filtro_invalido": verificar_filtros(dados_clubes),
+    }
+    # Há clubes estrangeiros no ficheiro (ex: Champions), por isso é só aviso
+    avisos = {
+        "fora_de_portugal": [
+            {"id": ids[i], "latitude": float(colunas["latitude"][i]), "longitude": float(colunas["longitude"][i])}
+            for i in np.flatnonzero(fora)
+        ],
+        "coordenadas_em_falta": ids[sem_coordenadas].tolist(),
+        "coordenadas_partilhadas": partilhadas,
+        "clubes_muito_proximos": proximos,
+        "tipo_equipamento_invalido": tipos_invalidos,
+        "equipamentos_desconhecidos": equipamentos_desconhecidos,
+    }
+
+    return {
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total_clubes": len(dados_clubes),
+        "resumo": {
+            "erros": {nome: len(valor) for nome, valor in erros.items()},
+            "avisos": {nome: len(valor) for nome, valor in avisos.items()},
+        },
+        "erros": erros,
+        "avisos": avisos,
+    }
+
+def main():
+    """Valida clubes.json e escreve um relatório JSON"""
+    parser = argparse.ArgumentParser(description="Valida o ficheiro de clubes e gera um relatório de qualidade")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON a validar")
+    parser.add_argument("--saida", help="escreve o relatório neste ficheiro em vez do stdout")
+    parser.add_argument("--min-partilhados", type=int, default=2,
+                        help="nº mínimo de clubes com as mesmas coordenadas para reportar")
+    parser.add_argument("--distancia-minima", type=float, default=50.0,
+                        help="distância (m) abaixo da qual dois clubes são reportados como muito próximos")
+    parser.add_argument("--estrito", action="store_true", help="sai com código 1 também quando há avisos")
+    args = parser.parse_args()
+
+    try:
+        with open(args.arquivo, "r", encoding="utf-8") as f:
+            dados_clubes = json.load(f)
+        relatorio = validar(dados_clubes, args.min_partilhados, args.distancia_minima)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Não foi possível validar {args.arquivo}: {e}")
+        sys.exit(2)
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        logger.info(f"📄 Relatório escrito em {args.saida}")
+    else:
+        print(texto)
+
+    total_erros = sum(relatorio["resumo"]["erros"].values())
+    total_avisos = sum(relatorio["resumo"]["avisos"].values())
+    logger.info(f"📊 {relatorio['total_clubes']} clubes: {total_erros} erros, {total_avisos} avisos")
+
+    if total_erros or (args.estrito and total_avisos):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
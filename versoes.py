@@ -0,0 +1,146 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PASTA_VERSOES = "dados/versoes"
+MAX_VERSOES = 30
+
+def json_canonico(dados):
+    """
+    Serializa em JSON compacto e determinístico (chaves ordenadas)
+    """
+    return json.dumps(dados, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+def indexar_por_id(dados_clubes):
+    """
+    Indexa os clubes pelo ID (se houver IDs repetidos, fica o último)
+    """
+    por_id = {}
+    for clube in dados_clubes:
+        clube_id = clube.get("id")
+        if not clube_id:
+            continue
+        if clube_id in por_id:
+            logger.warning(f"⚠️ ID repetido {clube_id} - só o último registo entra na versão")
+        por_id[clube_id] = clube
+    return por_id
+
+def hash_versao(por_id):
+    """
+    Hash do conteúdo, independente da ordem dos clubes no ficheiro
+    """
+    ordenados = [por_id[clube_id] for clube_id in sorted(por_id)]
+    return hashlib.sha256(json_canonico(ordenados).encode("utf-8")).hexdigest()
+
+def calcular_delta(antigos, novos):
+    """
+    Diferença por ID entre duas versões: clubes adicionados, alterados e removidos
+    """
+    adicionados = [novos[i] for i in novos if i not in antigos]
+    alterados = [novos[i] for i in novos
+                 if i in antigos and json_canonico(novos[i]) != json_canonico(antigos[i])]
+    removidos = [i for i in antigos if i not in novos]
+    return {"adicionados": adicionados, "alterados": alterados, "removidos": removidos}
+
+def aplicar_delta(por_id, delta):
+    """
+    Aplica um delta a clubes indexados por ID (mesma lógica que script.js)
+    """
+    resultado = dict(por_id)
+    for clube_id in delta["removidos"]:
+        resultado.pop(clube_id, None)
+    for clube in delta["alterados"] + delta["adicionados"]:
+        resultado[clube["id"]] = clube
+    return resultado
+
+def _escrever_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(json_canonico(dados))
+
+def carregar_manifesto(pasta=PASTA_VERSOES):
+    """
+    Carrega o manifesto de versões (ou um manifesto vazio)
+    """
+    caminho = os.path.join(pasta, "manifest.json")
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"atual": None, "snapshot": None, "versoes": []}
+
+def publicar_versao(dados_clubes, pasta=PASTA_VERSOES, max_versoes=MAX_VERSOES):
+    """
+    Regista uma nova versão se o conteúdo mudou: escreve o delta em relação à
+    versão anterior, o snapshot completo da nova versão e atualiza o manifesto
+    """
+    os.makedirs(pasta, exist_ok=True)
+    manifesto = carregar_manifesto(pasta)
+
+    novos = indexar_por_id(dados_clubes)
+    novo_hash = hash_versao(novos)
+
+    if manifesto["atual"] == novo_hash:
+        logger.info(f"📋 Sem alterações (versão {novo_hash[:12]})")
+        return manifesto
+
+    entrada = {
+        "hash": novo_hash,
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total": len(novos),
+        "anterior": manifesto["atual"],
+        "delta": None,
+    }
+
+    snapshot_anterior = manifesto.get("snapshot")
+    if snapshot_anterior and os.path.exists(os.path.join(pasta, snapshot_anterior)):
+        with open(os.path.join(pasta, snapshot_anterior), "r", encoding="utf-8") as f:
+            antigos = indexar_por_id(json.load(f))
+
+        delta = calcular_delta(antigos, novos)
+        delta["de"] = manifesto["atual"]
+        delta["para"] = novo_hash
+        nome_delta = f"delta-{manifesto['atual'][:12]}-{novo_hash[:12]}.json"
+        _escrever_json(os.path.join(pasta, nome_delta), delta)
+        entrada["delta"] = nome_delta
+        logger.info(f"🔄 Delta {nome_delta}: +{len(delta['adicionados'])} "
+                    f"~{len(delta['alterados'])} -{len(delta['removidos'])}")
+
+        os.remove(os.path.join(pasta, snapshot_anterior))
+
+    nome_snapshot = f"clubes-{novo_hash[:12]}.json"
+    _escrever_json(os.path.join(pasta, nome_snapshot), [novos[i] for i in sorted(novos)])
+
+    versoes = manifesto["versoes"] + [entrada]
+    # Remove os deltas das versões mais antigas
+    for antiga in versoes[:-max_versoes]:
+        if antiga.get("delta") and os.path.exists(os.path.join(pasta, antiga["delta"])):
+            os.remove(os.path.join(pasta, antiga["delta"]))
+    versoes = versoes[-max_versoes:]
+
+    manifesto = {"atual": novo_hash, "snapshot": nome_snapshot, "versoes": versoes}
+    with open(os.path.join(pasta, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"✅ Versão {novo_hash[:12]} publicada ({len(novos)} clubes)")
+    return manifesto
+
+def main():
+    """Publica uma nova versão de clubes.json com delta para a anterior"""
+    parser = argparse.ArgumentParser(description="Gera o manifesto de versões e os deltas de clubes.json")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("--pasta", default=PASTA_VERSOES, help="pasta de saída das versões")
+    parser.add_argument("--max-versoes", type=int, default=MAX_VERSOES, help="nº de deltas a manter")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    publicar_versao(dados_clubes, args.pasta, args.max_versoes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from validar import RAIO_TERRA_M, carregar_colunas
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+K_VIZINHOS = 5
+
+def para_vetores(lat, lon):
+    """
+    Converte latitude/longitude em vetores unitários 3D (a distância euclidiana
+    entre vetores é monótona com a distância ao longo da superfície)
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def corda_para_metros(corda):
+    return 2 * RAIO_TERRA_M * np.arcsin(np.clip(np.asarray(corda) / 2, 0.0, 1.0))
+
+def metros_para_corda(metros):
+    return 2 * math.sin(min(metros / RAIO_TERRA_M, math.pi) / 2)
+
+def _particionar(pontos, tamanho_folha):
+    """
+    Constrói uma KD-tree implícita: devolve a permutação dos pontos e, por nó,
+    o intervalo [inicio, fim) nessa permutação, os filhos e a caixa envolvente
+    """
+    ordem = np.arange(len(pontos))
+    inicios, fins, filhos, caixas_min, caixas_max = [], [], [], [], []
+
+    def novo_no(inicio, fim):
+        bloco = pontos[ordem[inicio:fim]]
+        inicios.append(inicio)
+        fins.append(fim)
+        filhos.append(None)
+        caixas_min.append(bloco.min(axis=0))
+        caixas_max.append(bloco.max(axis=0))
+        return len(inicios) - 1
+
+    pilha = [novo_no(0, len(pontos))] if len(pontos) else []
+    while pilha:
+        no = pilha.pop()
+        inicio, fim = inicios[no], fins[no]
+        if fim - inicio <= tamanho_folha:
+            continue
+        eixo = int(np.argmax(caixas_max[no] - caixas_min[no]))
+        meio = (inicio + fim) // 2
+        bloco = ordem[inicio:fim]
+        particao = np.argpartition(pontos[bloco, eixo], meio - inicio)
+        ordem[inicio:fim] = bloco[particao]
+        esquerda, direita = novo_no(inicio, meio), novo_no(meio, fim)
+        filhos[no] = (esquerda, direita)
+        pilha.extend((esquerda, direita))
+
+    return {
+        "ordem": ordem,
+        "inicio": np.array(inicios, dtype=np.int64),
+        "fim": np.array(fins, dtype=np.int64),
+        "filhos": filhos,
+        "min": np.array(caixas_min).reshape(-1, 3),
+        "max": np.array(caixas_max).reshape(-1, 3),
+    }
+
+def _distancia2_caixas(a_min, a_max, b_min, b_max):
+    """
+    Quadrado da distância mínima entre duas caixas (0 se se intersectam)
+    """
+    intervalo = np.maximum(0.0, np.maximum(a_min - b_max, b_min - a_max))
+    return float(np.dot(intervalo, intervalo))
+
+class IndiceEspacial:
+    """
+    Índice de vizinhos mais próximos sobre as coordenadas dos clubes (KD-tree
+    em vetores unitários na esfera). As consultas em lote agrupam os pontos
+    de consulta e calculam as distâncias de cada grupo de forma vetorizada.
+    """
+
+    def __init__(self, ids, latitude, longitude, tamanho_folha=32):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        validos = ~(np.isnan(latitude) | np.isnan(longitude))
+
+        self.ids = np.asarray(ids, dtype=object)[validos]
+        self.latitude = latitude[validos]
+        self.longitude = longitude[validos]
+        self.pontos = para_vetores(self.latitude, self.longitude)
+        self.tamanho_folha = tamanho_folha
+        self.arvore = _particionar(self.pontos, tamanho_folha)
+
+    @classmethod
+    def de_clubes(cls, dados_clubes, tamanho_folha=32):
+        colunas = carregar_colunas(dados_clubes)
+        return cls(colunas["id"], colunas["latitude"], colunas["longitude"], tamanho_folha)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _folhas_perto(self, caixa_min, caixa_max, raio2):
+        """
+        Folhas cuja caixa está a menos de sqrt(raio2) da caixa de consulta
+        """
+        arvore = self.arvore
+        folhas, pilha = [], [0] if len(self) else []
+        while pilha:
+            no = pilha.pop()
+            if _distancia2_caixas(caixa_min, caixa_max, arvore["min"][no], arvore["max"][no]) > raio2:
+                continue
+            if arvore["filhos"][no] is None:
+                folhas.append(no)
+            else:
+                pilha.extend(arvore["filhos"][no])
+        return folhas
+
+    def _primeiras_folhas(self, caixa_min, caixa_max, minimo):
+        """
+        Folhas por ordem de proximidade à caixa, até somarem pelo menos `minimo` pontos
+        """
+        arvore = self.arvore
+        folhas, total = [], 0
+        heap = [(0.0, 0)]
+        while heap and total < minimo:
+            _, no = heapq.heappop(heap)
+            if arvore["filhos"][no] is None:
+                folhas.append(no)
+                total += arvore["fim"][no] - arvore["inicio"][no]
+                continue
+            for filho in arvore["filhos"][no]:
+                heapq.heappush(heap, (_distancia2_caixas(caixa_min, caixa_max,
+                                                         arvore["min"][filho], arvore["max"][filho]), filho))
+        return folhas
+
+    def _indices_folhas(self, folhas):
+        arvore = self.arvore
+        return np.concatenate([arvore["ordem"][arvore["inicio"][f]:arvore["fim"][f]] for f in folhas])
+
+    def _k_grupo(self, consultas, k, proprios=None):
+        """
+        k vizinhos de um grupo de pontos próximos entre si. Primeiro obtém um
+        limite superior com as folhas mais próximas, depois examina todas as
+        folhas dentro desse limite.
+        """
+        caixa_min, caixa_max = consultas.min(axis=0), consultas.max(axis=0)
+        extra = 1 if proprios is not None else 0
+
+        candidatos = self._indices_folhas(self._primeiras_folhas(caixa_min, caixa_max, k + extra))
+        d2 = ((consultas[:, None, :] - self.pontos[candidatos][None, :, :]) ** 2).sum(axis=2)
+        if proprios is not None:
+            d2[proprios[:, None] == candidatos[None, :]] = np.inf
+        kk = min(k, d2.shape[1]) - 1
+        limite = float(np.partition(d2, kk, axis=1)[:, kk].max()) if kk >= 0 else np.inf
+
+        candidatos = self._indices_folhas(self._folhas_perto(caixa_min, caixa_max, limite))
+        d2 = ((consultas[:, None, :] - self.pontos[candidatos][None, :, :]) ** 2).sum(axis=2)
+        if proprios is not None:
+            d2[proprios[:, None] == candidatos[None, :]] = np.inf
+
+        k_real = min(k, len(candidatos) - extra)
+        melhores = np.argpartition(d2, k_real - 1, axis=1)[:, :k_real] if k_real > 0 else \
+            np.empty((len(consultas), 0), dtype=np.int64)
+        d_melhores = np.take_along_axis(d2, melhores, axis=1)
+        ordem = np.argsort(d_melhores, axis=1, kind="stable")
+        melhores = np.take_along_axis(melhores, ordem, axis=1)
+        d_melhores = np.take_along_axis(d_melhores, ordem, axis=1)
+        return candidatos[melhores], corda_para_metros(np.sqrt(d_melhores))
+
+    def k_vizinhos_lote(self, latitude, longitude, k=K_VIZINHOS):
+        """
+        k vizinhos mais próximos de vários pontos.
+        Devolve (índices, distâncias em metros), arrays com forma (n, k).
+        """
+        consultas = para_vetores(latitude, longitude)
+        return self._k_lote(consultas, k)
+
+    def _k_lote(self, consultas, k, proprios=None):
+        k_real = max(0, min(k, len(self) - (1 if proprios is not None else 0)))
+        indices = np.zeros((len(consultas), k_real), dtype=np.int64)
+        distancias = np.zeros((len(consultas), k_real))
+        if k_real == 0 or len(consultas) == 0:
+            return indices, distancias
+
+        # Agrupa as consultas pela mesma partição espacial usada no índice
+        grupos = _particionar(consultas, self.tamanho_folha)
+        for no, filhos in enumerate(grupos["filhos"]):
+            if filhos is not None:
+                continue
+            membros = grupos["ordem"][grupos["inicio"][no]:grupos["fim"][no]]
+            i, d = self._k_grupo(consultas[membros], k_real,
+                                 proprios[membros] if proprios is not None else None)
+            indices[membros], distancias[membros] = i, d
+        return indices, distancias
+
+    def k_vizinhos(self, latitude, longitude, k=K_VIZINHOS):
+        """
+        k clubes mais próximos de um ponto: [(id, distância em metros)]
+        """
+        indices, distancias = self.k_vizinhos_lote([latitude], [longitude], k)
+        return [(self.ids[i], float(d)) for i, d in zip(indices[0], distancias[0])]
+
+    def no_raio(self, latitude, longitude, raio_m):
+        """
+        Clubes a menos de raio_m metros de um ponto, por ordem de distância
+        """
+        ponto = para_vetores([latitude], [longitude])[0]
+        corda = metros_para_corda(raio_m)
+        folhas = self._folhas_perto(ponto, ponto, corda * corda)
+        if not folhas:
+            return []
+        candidatos = self._indices_folhas(folhas)
+        distancias = corda_para_metros(np.sqrt(((self.pontos[candidatos] - ponto) ** 2).sum(axis=1)))
+        dentro = distancias <= raio_m
+        candidatos, distancias = candidatos[dentro], distancias[dentro]
+        ordem = np.argsort(distancias, kind="stable")
+        return [(self.ids[i], float(d)) for i, d in zip(candidatos[ordem], distancias[ordem])]
+
+    def vizinhos_de_todos(self, k=K_VIZINHOS):
+        """
+        Os k vizinhos de cada clube do índice (excluindo o próprio)
+        """
+        return self._k_lote(self.pontos, k, proprios=np.arange(len(self)))
+
+def exportar_vizinhos(dados_clubes, k=K_VIZINHOS):
+    """
+    Lista precalculada dos k clubes mais próximos de cada clube, para o mapa
+    """
+    indice = IndiceEspacial.de_clubes(dados_clubes)
+    indices, distancias = indice.vizinhos_de_todos(k)
+    return {
+        "k": k,
+        "vizinhos": {
+            indice.ids[i]: [[indice.ids[j], round(float(d) / 1000, 2)] for j, d in zip(indices[i], distancias[i])]
+            for i in range(len(indice))
+        },
+    }
+
+def main():
+    """Gera a lista de vizinhos de cada clube ou responde a uma consulta"""
+    parser = argparse.ArgumentParser(description="Índice de clubes mais próximos")
+    parser.add_argument("arquivo", nargs="?", default="clubes.json", help="ficheiro JSON de clubes")
+    parser.add_argument("-k", type=int, default=K_VIZINHOS, help="nº de vizinhos por clube")
+    parser.add_argument("--saida", default="dados/vizinhos.json", help="ficheiro de saída")
+    parser.add_argument("--perto", nargs=2, type=float, metavar=("LAT", "LON"),
+                        help="mostra os clubes mais próximos deste ponto em vez de exportar")
+    parser.add_argument("--raio", type=float, help="com --perto: clubes a menos de RAIO km")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        dados_clubes = json.load(f)
+
+    if args.perto:
+        indice = IndiceEspacial.de_clubes(dados_clubes)
+        nomes = {clube.get("id"): clube.get("club") for clube in dados_clubes}
+        if args.raio:
+            resultados = indice.no_raio(args.perto[0], args.perto[1], args.raio * 1000)
+        else:
+            resultados = indice.k_vizinhos(args.perto[0], args.perto[1], args.k)
+        for clube_id, distancia in resultados:
+            logger.info(f"  📍 {nomes.get(clube_id)} (ID: {clube_id}) - {distancia / 1000:.2f} km")
+        return
+
+    vizinhos = exportar_vizinhos(dados_clubes, args.k)
+    pasta = os.path.dirname(args.saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(vizinhos, f, ensure_ascii=False, separators=(",", ":"))
+    logger.info(f"✅ Vizinhos de {len(vizinhos['vizinhos'])} clubes salvos em {args.saida}")
+
+if __name__ == "__main__":
+    main()